@@ -0,0 +1,62 @@
+"""
+Benchmark site_kpis against a per-site Python loop.
+
+    python -m benchmarks.bench_aggregation --sites 10000 --years 10
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from utils.aggregation import site_kpis
+from utils.data_loader import generate_synthetic_data
+
+
+def loop_kpis(df, site_ids):
+    """
+    Reference implementation: the single-series app.py logic, once per site.
+    """
+    rows = []
+    for site in site_ids:
+        site_df = df[df['site_id'] == site].groupby('date').sum(numeric_only=True)
+        last_12m = site_df.tail(12)
+        cost = site_df['total_cost']
+        trend = (cost.iloc[-1] - cost.iloc[-2]) / cost.iloc[-2] * 100 if len(cost) >= 2 else 0
+        rows.append({
+            'site_id': site,
+            'total_energy_kwh': site_df['energy_consumption_kwh'].sum(),
+            'annual_cost': last_12m['total_cost'].sum(),
+            'cost_trend_pct': trend,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--meters', type=int, default=1)
+    parser.add_argument('--loop-sample', type=int, default=100,
+                        help='sites timed with the per-site loop (extrapolated to --sites)')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    df = generate_synthetic_data(months=args.years * 12, n_sites=args.sites, meters_per_site=args.meters)
+    gen_s = time.perf_counter() - t0
+    print(f"generated {len(df):,} rows ({args.sites:,} sites x {args.meters} meters x {args.years * 12} months) in {gen_s:.2f}s")
+
+    t0 = time.perf_counter()
+    kpis = site_kpis(df)
+    vec_s = time.perf_counter() - t0
+    print(f"site_kpis: {len(kpis):,} sites in {vec_s:.3f}s ({len(df) / vec_s:,.0f} rows/s)")
+
+    sample = list(df['site_id'].cat.categories[:args.loop_sample])
+    t0 = time.perf_counter()
+    loop_kpis(df, sample)
+    loop_s = (time.perf_counter() - t0) / len(sample) * args.sites
+    print(f"per-site loop (extrapolated from {len(sample)} sites): {loop_s:.1f}s")
+    print(f"speedup: {loop_s / vec_s:,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Long-history charts: figure payload size and server-side build time, full series vs downsampled.
+
+    python -m benchmarks.bench_charting --years 5 --freq 15min
+
+"full" is what the pages did before: the whole portfolio series in a px.line
+(and on the forecast page, concatenated with the forecast every rerun).
+"lttb"/"minmax" send DEFAULT_POINTS points from utils.charting. Payload is the
+figure JSON Streamlit ships to the browser; time covers building the figure and
+serializing it. Browser render time scales with the point count in the payload.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregation import portfolio_monthly
+from utils.charting import DEFAULT_POINTS, ChartCache, chart_series
+from utils.data_loader import generate_synthetic_data
+
+
+def measure(build, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        payload = build().to_json()
+        times.append(time.perf_counter() - t0)
+    return len(payload), float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--freq', default='15min')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    df = portfolio_monthly(generate_synthetic_data(months=args.years * 12, freq=args.freq))
+    forecast = pd.DataFrame({'date': pd.date_range(df['date'].iloc[-1], periods=4, freq='MS')[1:],
+                             'energy_consumption_kwh': df['energy_consumption_kwh'].tail(3).to_numpy()})
+    print(f"{len(df):,} points ({args.years} years at {args.freq})")
+
+    def full_trend():
+        return px.line(df, x='date', y='energy_consumption_kwh')
+
+    def full_forecast():
+        hist = df[['date', 'energy_consumption_kwh']].copy()
+        hist['Type'] = 'Historical'
+        fc = forecast.copy()
+        fc['Type'] = 'Forecast'
+        return px.line(pd.concat([hist, fc]), x='date', y='energy_consumption_kwh', color='Type')
+
+    def downsampled(method, cache, x_range=None):
+        def build():
+            x, y = chart_series(df, 'date', 'energy_consumption_kwh', x_range=x_range,
+                                n_out=args.points, method=method, cache=cache)
+            fig = go.Figure(go.Scatter(x=x, y=y, mode='lines'))
+            fig.add_trace(go.Scatter(x=forecast['date'], y=forecast['energy_consumption_kwh'], mode='lines'))
+            return fig
+        return build
+
+    end = df['date'].iloc[-1]
+    zoom = (end - pd.Timedelta(days=30), end)
+    cases = [
+        ('full trend (before)', full_trend),
+        ('full forecast + concat (before)', full_forecast),
+    ]
+    for method in ('lttb', 'minmax'):
+        cases.append((f'{method}, cold', lambda m=method: downsampled(m, ChartCache())()))
+        warm = ChartCache()
+        downsampled(method, warm)()
+        cases.append((f'{method}, cached', downsampled(method, warm)))
+        cases.append((f'{method}, 30-day zoom', lambda m=method: downsampled(m, ChartCache(), zoom)()))
+
+    print(f"{'case':<34}{'payload KB':>12}{'build+json s':>14}")
+    base_bytes = base_s = None
+    for label, build in cases:
+        size, seconds = measure(build, args.repeats)
+        line = f"{label:<34}{size / 1024:>12,.0f}{seconds:>14.3f}"
+        if base_bytes is None:
+            base_bytes, base_s = size, seconds
+        elif 'before' not in label:
+            line += f"   ({base_bytes / size:,.0f}x smaller, {base_s / seconds:,.1f}x faster)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
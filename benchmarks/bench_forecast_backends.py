@@ -0,0 +1,65 @@
+"""
+Forecasting backends: latency of one dashboard forecast, and accuracy vs cost from one backtest.
+
+    python -m benchmarks.bench_forecast_backends --sites 200 --months 60
+
+"rerun" is what the forecast page pays on a cache miss: train_and_forecast on
+the portfolio series with a 90% interval. The backtests run every backend
+through utils.backtesting.backtest_backends on the same rolling-origin folds,
+for the portfolio series and for every site of the fleet at once, and report
+mean MAE, fit/predict time per fold, peak traced memory and model size.
+
+The rerun's holdout MAE is the one-step figure the page shows; it scores
+each month with its actual lags, so compare accuracy on the backtest MAE.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.aggregation import portfolio_monthly
+from utils.backtesting import backtest_backends
+from utils.data_loader import generate_synthetic_data
+from utils.forecasting import BACKENDS, train_and_forecast
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=200)
+    parser.add_argument('--months', type=int, default=60)
+    parser.add_argument('--horizon', type=int, default=3)
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS))
+    args = parser.parse_args()
+
+    df = generate_synthetic_data(months=args.months, n_sites=args.sites)
+    portfolio = portfolio_monthly(df)
+    print(f"{args.sites} sites x {args.months} months\n")
+
+    print(f"{'rerun (portfolio, interval=0.9)':<32}{'s':>8}{'holdout MAE':>14}")
+    base_s = None
+    for backend in args.backends:
+        times = []
+        for _ in range(args.repeats):
+            t0 = time.perf_counter()
+            _, mae = train_and_forecast(portfolio, save=False, horizon=args.horizon, interval=0.9,
+                                        backend=backend)
+            times.append(time.perf_counter() - t0)
+        seconds = float(np.median(times))
+        line = f"{backend:<32}{seconds:>8.3f}{mae:>14,.0f}"
+        if base_s is None:
+            base_s = seconds
+        else:
+            line += f"   ({base_s / seconds:,.1f}x faster)"
+        print(line)
+
+    for label, group_col in (('portfolio', None), (f'{args.sites} sites', 'site_id')):
+        leaderboard, _ = backtest_backends(df, backends=args.backends, n_splits=args.splits,
+                                           horizon=args.horizon, group_col=group_col)
+        print(f"\nbacktest, {label}: {args.splits} folds x {args.horizon} months")
+        print(leaderboard.to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Throughput (series/s) of batched forecasting vs calling train_and_forecast per series.
+
+    python -m benchmarks.bench_forecasting --sites 200 --months 48
+"""
+import argparse
+import time
+
+from utils.data_loader import generate_synthetic_data
+from utils.forecasting import TARGET, train_and_forecast, train_and_forecast_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=200)
+    parser.add_argument('--months', type=int, default=48)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--horizon', type=int, default=3)
+    parser.add_argument('--strategy', choices=['recursive', 'direct'], default='recursive')
+    parser.add_argument('--loop-sample', type=int, default=20,
+                        help='series timed with the sequential loop')
+    args = parser.parse_args()
+
+    df = generate_synthetic_data(months=args.months, n_sites=args.sites)
+    sites = list(df['site_id'].cat.categories)
+
+    t0 = time.perf_counter()
+    for site in sites[:args.loop_sample]:
+        train_and_forecast(df.loc[df['site_id'] == site, ['date', TARGET]], save=False,
+                           horizon=args.horizon, strategy=args.strategy)
+    loop_rate = args.loop_sample / (time.perf_counter() - t0)
+    print(f"sequential loop: {loop_rate:,.1f} series/s")
+
+    t0 = time.perf_counter()
+    train_and_forecast_batch(df, mode='per_series', n_jobs=args.n_jobs,
+                             horizon=args.horizon, strategy=args.strategy)
+    per_series_rate = args.sites / (time.perf_counter() - t0)
+    print(f"per_series (joblib, n_jobs={args.n_jobs}): {per_series_rate:,.1f} series/s "
+          f"({per_series_rate / loop_rate:.1f}x)")
+
+    t0 = time.perf_counter()
+    train_and_forecast_batch(df, mode='pooled', horizon=args.horizon, strategy=args.strategy)
+    pooled_rate = args.sites / (time.perf_counter() - t0)
+    print(f"pooled: {pooled_rate:,.1f} series/s ({pooled_rate / loop_rate:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Latency of update_model (one new month) vs a full refit, across history lengths.
+
+    python -m benchmarks.bench_incremental --months 60 120 240 480
+"""
+import argparse
+import time
+
+from utils.data_loader import generate_synthetic_data
+from utils.forecasting import train_and_forecast, update_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--months', type=int, nargs='+', default=[60, 120, 240, 480])
+    args = parser.parse_args()
+
+    print(f"{'months':>8} {'full refit (s)':>15} {'update (s)':>11} {'path':>12}")
+    for months in args.months:
+        df = generate_synthetic_data(months)
+        history, new_rows = df.iloc[:-1], df.iloc[-1:]
+
+        t0 = time.perf_counter()
+        train_and_forecast(history)
+        full_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _, info = update_model(history, new_rows)
+        update_s = time.perf_counter() - t0
+
+        path = info['reason'] if info['refit'] else 'incremental'
+        print(f"{months:>8} {full_s:>15.3f} {update_s:>11.3f} {path:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Live-ingest throughput and refresh latency for the ring-buffer state.
+
+    python -m benchmarks.bench_live --meters 1000 --intervals 672
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from utils.live import FileTailer, LiveState, simulate_feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--meters', type=int, default=1000)
+    parser.add_argument('--intervals', type=int, default=672,
+                        help='ticks to replay (672 = one week of 15-minute readings)')
+    parser.add_argument('--intervals-per-tick', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'feed.csv')
+        state = LiveState(max_meters=args.meters)
+        tailer = FileTailer(path)
+
+        next_ts = 0
+        ingest_s = []
+        refresh_s = []
+        rows = 0
+        for _ in range(0, args.intervals, args.intervals_per_tick):
+            next_ts = simulate_feed(path, args.meters, args.intervals_per_tick, start_ts=next_ts, seed=0)
+
+            t0 = time.perf_counter()
+            rows += state.ingest(tailer.read_new())
+            ingest_s.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            state.kpis()
+            state.fleet.frame()
+            refresh_s.append(time.perf_counter() - t0)
+
+    ingest_s = np.array(ingest_s)
+    refresh_s = np.array(refresh_s)
+    print(f"{args.meters:,} meters, {len(ingest_s):,} ticks, {rows:,} rows")
+    print(f"ingest throughput: {rows / ingest_s.sum():,.0f} rows/s "
+          f"(p50 {np.median(ingest_s) * 1000:.2f} ms, p95 {np.percentile(ingest_s, 95) * 1000:.2f} ms per tick)")
+    print(f"refresh latency (KPIs + trend frame): p50 {np.median(refresh_s) * 1000:.2f} ms, "
+          f"p95 {np.percentile(refresh_s, 95) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
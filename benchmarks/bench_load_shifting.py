@@ -0,0 +1,32 @@
+"""
+Solve time of optimize_load_shift for a fleet of hourly load profiles.
+
+    python -m benchmarks.bench_load_shifting --sites 2000 --hours 8760
+"""
+import argparse
+
+import numpy as np
+
+from utils.optimization import TYPICAL_DAILY_PROFILE, optimize_load_shift, tou_tariff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=2000)
+    parser.add_argument('--hours', type=int, default=8760)
+    parser.add_argument('--flexible-share', type=float, default=0.2)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    profile = np.resize(TYPICAL_DAILY_PROFILE * 2400, args.hours)
+    load = profile * rng.uniform(0.5, 2.0, (args.sites, 1)) * rng.uniform(0.9, 1.1, (args.sites, args.hours))
+
+    _, metrics = optimize_load_shift(load, tou_tariff(args.hours, base_price=0.13), args.flexible_share)
+    savings_pct = metrics['savings'].sum() / metrics['base_cost'].sum() * 100
+    print(f"{args.sites:,} sites x {args.hours:,} hours solved in {metrics['solve_s']:.2f}s "
+          f"({metrics['sites_per_s']:,.0f} sites/s, {metrics['site_hours_per_s']:,.0f} site-hours/s)")
+    print(f"fleet cost reduction: {savings_pct:.2f}%, shifted {metrics['shifted_kwh'].sum() / 1e6:,.1f} GWh")
+
+
+if __name__ == '__main__':
+    main()
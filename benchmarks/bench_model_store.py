@@ -0,0 +1,123 @@
+"""
+Model store: disk size, save time, and per-worker load time and memory for many per-site models.
+
+    python -m benchmarks.bench_model_store --sites 200 --workers 4
+
+Fits one forest per synthetic site, saves each into a temporary store
+(uncompressed and compressed), then starts --workers processes that load all
+models at once, as several Streamlit server processes would. Memory is read from
+/proc while every worker still holds its models:
+- RSS is resident memory;
+- anon is private memory;
+- file is page-cache memory shared through mmap;
+- PSS splits shared pages across the processes that map them.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from utils import model_store
+from utils.data_loader import generate_synthetic_data
+from utils.feature_engineering import create_features
+from utils.forecasting import FEATURES, MODEL_PARAMS, TARGET
+
+WORKER_SCRIPT = """
+import json, sys, time
+from utils import model_store
+root, mmap_mode = sys.argv[1], sys.argv[2] if sys.argv[2] != 'none' else None
+names = model_store.list_models(root)
+t0 = time.perf_counter()
+models = [model_store.load_model(name, root=root, mmap_mode=mmap_mode, cache=False) for name in names]
+print(json.dumps({'load_s': time.perf_counter() - t0, 'models': len(models)}), flush=True)
+sys.stdin.readline()  # hold the models until every worker has loaded
+
+def kb(path, field):
+    with open(path) as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+print(json.dumps({
+    'rss_mb': kb('/proc/self/status', 'VmRSS') / 1024,
+    'anon_mb': kb('/proc/self/status', 'RssAnon') / 1024,
+    'file_mb': kb('/proc/self/status', 'RssFile') / 1024,
+    'pss_mb': kb('/proc/self/smaps_rollup', 'Pss') / 1024,
+}), flush=True)
+"""
+
+
+def fit_site_models(n_sites, months):
+    from sklearn.ensemble import RandomForestRegressor
+
+    df = create_features(generate_synthetic_data(months, n_sites=n_sites), group_col='site_id').dropna()
+    models = {}
+    for site, frame in df.groupby('site_id', observed=True):
+        model = RandomForestRegressor(**MODEL_PARAMS)
+        model.fit(frame[FEATURES].to_numpy(), frame[TARGET].to_numpy())
+        models[str(site)] = model
+    return models
+
+
+def run_workers(root, mmap_mode, n_workers):
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    procs = [
+        subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT, root, mmap_mode or 'none'],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env)
+        for _ in range(n_workers)
+    ]
+    loads = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.write('\n')
+        p.stdin.flush()
+    memory = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.wait()
+    return loads, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=200)
+    parser.add_argument('--months', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--compress', type=int, default=3, help='joblib level for the compressed variant')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    models = fit_site_models(args.sites, args.months)
+    print(f"fitted {len(models)} site models in {time.perf_counter() - t0:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = [('uncompressed, mmap', 0, 'r'), ('uncompressed, no mmap', 0, None),
+                    (f'compress={args.compress}', args.compress, None)]
+        roots = {}
+        for compress in sorted({c for _, c, _ in variants}):
+            root = os.path.join(tmp, f"store_c{compress}")
+            t0 = time.perf_counter()
+            for name, model in models.items():
+                model_store.save_model(model, name, compress=compress, root=root)
+            save_s = time.perf_counter() - t0
+            objects = os.path.join(root, 'objects')
+            size_mb = sum(os.path.getsize(os.path.join(objects, f)) for f in os.listdir(objects)) / 2 ** 20
+            print(f"compress={compress}: saved in {save_s:.2f}s ({save_s / len(models) * 1000:.1f} ms/model), "
+                  f"{size_mb:.1f} MB on disk ({size_mb / len(models) * 1024:.0f} KB/model)")
+            roots[compress] = root
+
+        print(f"\n{args.workers} workers each loading all {len(models)} models")
+        print(f"{'variant':<24}{'load s':>8}{'RSS MB':>9}{'anon MB':>9}{'file MB':>9}{'PSS MB':>9}")
+        for label, compress, mmap_mode in variants:
+            loads, memory = run_workers(roots[compress], mmap_mode, args.workers)
+            mean = {k: np.mean([m[k] for m in memory]) for k in memory[0]}
+            print(f"{label:<24}{np.median([l['load_s'] for l in loads]):>8.2f}{mean['rss_mb']:>9.0f}"
+                  f"{mean['anon_mb']:>9.0f}{mean['file_mb']:>9.0f}{mean['pss_mb']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
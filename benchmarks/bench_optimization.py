@@ -0,0 +1,49 @@
+"""
+Scenario sweep: optimize_energy_grid vs calling optimize_energy in a Python loop.
+
+    python -m benchmarks.bench_optimization --sites 1000
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from utils.optimization import STRATEGIES, optimize_energy, optimize_energy_grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=1000)
+    parser.add_argument('--loop-sample', type=int, default=200_000,
+                        help='combinations timed with the scalar loop (extrapolated)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    energy = rng.uniform(5e4, 5e5, args.sites)
+    cost = energy * rng.uniform(0.12, 0.15, args.sites)
+    emissions = energy * 0.4 / 1000
+    reductions = np.arange(1, 51)
+    investments = np.array([0, 25_000, 50_000, 100_000, 250_000])
+    tariffs = np.array([0.9, 1.0, 1.2])
+
+    t0 = time.perf_counter()
+    grid = optimize_energy_grid(energy, cost, emissions, reductions, STRATEGIES, investments, tariffs)
+    vec_s = time.perf_counter() - t0
+    print(f"grid: {len(grid):,} combinations in {vec_s:.2f}s ({len(grid) / vec_s:,.0f}/s)")
+
+    combos = itertools.islice(
+        itertools.product(range(args.sites), STRATEGIES, reductions, tariffs), args.loop_sample
+    )
+    t0 = time.perf_counter()
+    n = 0
+    for site, strategy, reduction, tariff in combos:
+        optimize_energy(energy[site], cost[site] * tariff, emissions[site], reduction, strategy)
+        n += 1
+    loop_rate = n / (time.perf_counter() - t0)
+    print(f"scalar loop: {loop_rate:,.0f}/s -> {len(grid) / loop_rate:.1f}s extrapolated "
+          f"({len(grid) / loop_rate / vec_s:,.0f}x slower)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Multi-user load test: page latency and server RSS with many concurrent sessions.
+
+    python -m benchmarks.bench_serving --sessions 50
+    python -m benchmarks.bench_serving --source synthetic    # no artifacts: the forecast is trained on first use
+
+Starts `streamlit run app.py` headless in a temporary directory and opens
+--sessions websocket sessions against it, as browsers would. Sessions are
+spread round-robin over the dashboard pages (deep-linked with ?page=). They
+all request their first render at the same moment, then rerun --reruns more
+times, as a widget interaction would. The data comes from a pipeline run over a
+synthetic fleet (--source artifacts), or from the app's in-process fallback
+(--source synthetic).
+
+Reported:
+- p50/p95/max latency per page, from the rerun request to script_finished;
+- the server's RSS when idle, its peak while sessions run, and at the end.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+import numpy as np
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(PACKAGE_ROOT, 'app.py')
+PAGES = ["Executive Summary", "Energy Trends & Forecast", "Optimization Simulator",
+         "Strategic Scenario Analysis"]
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = rss_mb(pid)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, rss_mb(self.pid))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(cwd, port):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_PATH, '--server.headless', 'true',
+         '--server.port', str(port), '--server.address', '127.0.0.1',
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        cwd=cwd, env=dict(os.environ, PYTHONPATH=PACKAGE_ROOT),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit server did not become healthy")
+
+
+async def run_session(url, page, reruns, start, timings, errors):
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    async with websockets.connect(url, subprotocols=['streamlit'], max_size=None) as ws:
+        await start.wait()
+        for _ in range(1 + reruns):
+            msg = BackMsg()
+            msg.rerun_script.query_string = urlencode({'page': page})
+            t0 = time.perf_counter()
+            await ws.send(msg.SerializeToString())
+            while True:
+                fwd = ForwardMsg()
+                fwd.ParseFromString(await ws.recv())
+                kind = fwd.WhichOneof('type')
+                if (kind == 'delta' and fwd.delta.WhichOneof('type') == 'new_element'
+                        and fwd.delta.new_element.WhichOneof('type') == 'exception'):
+                    errors.append((page, fwd.delta.new_element.exception.message))
+                if kind == 'script_finished':
+                    break
+            timings.append((page, time.perf_counter() - t0))
+
+
+async def run_sessions(port, n_sessions, reruns, timings, errors):
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(run_session(url, PAGES[i % len(PAGES)], reruns, start, timings, errors))
+             for i in range(n_sessions)]
+    await asyncio.sleep(1.0)  # let every session connect
+    start.set()
+    await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--reruns', type=int, default=2, help='reruns per session after the first render')
+    parser.add_argument('--source', choices=['artifacts', 'synthetic'], default='artifacts')
+    parser.add_argument('--sites', type=int, default=200, help='synthetic fleet size for the pipeline run')
+    parser.add_argument('--months', type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_serving_') as tmp:
+        os.environ['ENERGY_AI_MODELS_DIR'] = os.path.join(tmp, 'models')
+        os.environ['ENERGY_AI_ARTIFACTS_DIR'] = os.path.join(tmp, 'artifacts')
+        if args.source == 'artifacts':
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'utils.pipeline', '--synthetic-sites', str(args.sites),
+                            '--months', str(args.months), '--forecast-mode', 'pooled'],
+                           cwd=tmp, env=dict(os.environ, PYTHONPATH=PACKAGE_ROOT),
+                           check=True, stdout=subprocess.DEVNULL)
+            print(f"pipeline: {args.sites} sites x {args.months} months in {time.perf_counter() - t0:.1f}s")
+
+        port = free_port()
+        server = start_server(tmp, port)
+        try:
+            idle_rss = rss_mb(server.pid)
+            sampler = RssSampler(server.pid)
+            sampler.start()
+            timings, errors = [], []
+            t0 = time.perf_counter()
+            asyncio.run(run_sessions(port, args.sessions, args.reruns, timings, errors))
+            wall = time.perf_counter() - t0
+            sampler.stop()
+            final_rss = rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{args.sessions} sessions x {1 + args.reruns} runs in {wall:.1f}s ({args.source})")
+    print(f"{'page':<30}{'runs':>6}{'p50 s':>8}{'p95 s':>8}{'max s':>8}")
+    for page in PAGES + ['all pages']:
+        s = np.array([sec for p, sec in timings if page in (p, 'all pages')])
+        if len(s):
+            print(f"{page:<30}{len(s):>6}{np.percentile(s, 50):>8.2f}{np.percentile(s, 95):>8.2f}{s.max():>8.2f}")
+    print(f"\nserver RSS: {idle_rss:,.0f} MB idle, {sampler.peak:,.0f} MB peak, {final_rss:,.0f} MB after")
+    if errors:
+        print(f"{len(errors)} page runs raised, e.g. {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold-start cost of the dashboard, one fresh interpreter per page.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --pages "Live Monitor" --runs 3
+
+Each run renders the page once through streamlit's AppTest (deep-linked with
+?page=...) under `python -X importtime`, and reports time to first render,
+the import time of the heavy packages and whether sklearn/plotly were loaded.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+PAGES = ["Executive Summary", "Energy Trends & Forecast", "Optimization Simulator",
+         "Strategic Scenario Analysis", "Live Monitor"]
+PACKAGES = ['streamlit', 'pandas', 'numpy', 'pyarrow', 'plotly', 'sklearn', 'scipy', 'joblib']
+
+RENDER_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=300)
+at.query_params['page'] = {page!r}
+at.run()
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    'first_render_s': elapsed,
+    'exception': bool(at.exception),
+    'sklearn': 'sklearn' in sys.modules,
+    'plotly': 'plotly.express' in sys.modules,
+}}))
+"""
+
+
+def _import_times(stderr):
+    """
+    Cumulative import time (ms) of each top-level package, from -X importtime output.
+    """
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit() and name.strip() in PACKAGES:
+            totals[name.strip()] = int(cumulative) / 1000
+    return totals
+
+
+def measure(page):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', RENDER_SCRIPT.format(app=APP_PATH, page=page)],
+        capture_output=True, text=True, cwd=os.path.dirname(APP_PATH),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page}: render failed\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['imports_ms'] = _import_times(proc.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', nargs='+', default=PAGES, choices=PAGES)
+    parser.add_argument('--runs', type=int, default=1, help='cold starts per page (median is reported)')
+    args = parser.parse_args()
+
+    header = f"{'page':<30}{'render s':>10}  {'sklearn':<8}{'plotly':<8}" + ''.join(f"{p:>10}" for p in PACKAGES)
+    print(header)
+    print(f"{'':<30}{'':>10}  {'':<16}" + ''.join(f"{'(ms)':>10}" for _ in PACKAGES))
+    for page in args.pages:
+        runs = [measure(page) for _ in range(args.runs)]
+        render_s = np.median([r['first_render_s'] for r in runs])
+        imports = {p: np.median([r['imports_ms'].get(p, 0.0) for r in runs]) for p in PACKAGES}
+        last = runs[-1]
+        flag = ' (exception)' if last['exception'] else ''
+        print(f"{page:<30}{render_s:>10.2f}  {str(last['sklearn']):<8}{str(last['plotly']):<8}"
+              + ''.join(f"{imports[p]:>10.0f}" for p in PACKAGES) + flag)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark suite: time and peak memory of the utils hot paths at several data
+scales, compared against a stored baseline.
+
+    python -m benchmarks.suite                          # small + medium, compare to baseline
+    python -m benchmarks.suite --scales large --filter create_features
+    python -m benchmarks.suite --save-baseline          # record the current numbers
+
+Every case is timed as the best of --repeat runs; peak memory is the tracemalloc
+peak of one extra run (numpy and pandas buffers are included; Arrow buffers
+are not, so Parquet reads show only their Python-side allocations). A case regresses
+when its time or peak memory exceeds the baseline by more than --tolerance.
+Baselines are machine-specific: record one on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from utils.aggregation import portfolio_monthly, site_kpis
+from utils.data_loader import generate_synthetic_data, load_csv
+from utils.feature_engineering import create_features
+from utils.forecasting import train_and_forecast, train_and_forecast_batch
+from utils.optimization import STRATEGIES, optimize_energy, optimize_energy_grid
+from utils.recommendation import fleet_recommendations, generate_recommendation
+from utils.rollup import RollupCube
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# name -> (months, sites, freq). 15-minute data at full fleet scale is listed so
+# it can be run on a large machine; --max-rows skips it by default.
+DATASETS = {
+    'monthly_24m_1site': (24, None, 'MS'),
+    'monthly_10y_100sites': (120, 100, 'MS'),
+    'monthly_10y_1ksites': (120, 1000, 'MS'),
+    'monthly_10y_10ksites': (120, 10000, 'MS'),
+    '15min_24m_1site': (24, None, '15min'),
+    '15min_1y_10sites': (12, 10, '15min'),
+    '15min_1y_100sites': (12, 100, '15min'),
+    '15min_10y_10ksites': (120, 10000, '15min'),
+}
+
+# Pooled forest fits grow superlinearly with rows; larger fleets are covered by
+# benchmarks.bench_forecasting.
+BATCH_FORECAST_MAX_SITES = 100
+
+SCALES = {
+    'small': ['monthly_24m_1site', 'monthly_10y_100sites', '15min_24m_1site'],
+    'medium': ['monthly_10y_1ksites', '15min_1y_10sites'],
+    'large': ['monthly_10y_10ksites', '15min_1y_100sites', '15min_10y_10ksites'],
+}
+
+
+def dataset_rows(name):
+    months, sites, freq = DATASETS[name]
+    steps_per_month = {'MS': 1, 'D': 30.4, 'h': 730, '15min': 2920}[freq]
+    return int(months * (sites or 1) * steps_per_month)
+
+
+def _cases(name, df):
+    """
+    (case name, callable) pairs for one dataset. Each callable reruns the full operation.
+    """
+    months, sites, freq = DATASETS[name]
+    group_col = 'site_id' if sites else None
+    cases = [
+        ('generate_synthetic_data', lambda: generate_synthetic_data(months, n_sites=sites, freq=freq)),
+        ('create_features', lambda: create_features(df, group_col=group_col, freq=freq)),
+        ('rollup_build', lambda: RollupCube.from_frame(df)),
+    ]
+    if freq != 'MS':
+        return cases
+
+    portfolio = portfolio_monthly(df)
+    kpis = site_kpis(df) if sites else None
+    cube = RollupCube.from_frame(df, grains=('month',))
+    cases.append(('rollup_fleet_totals', cube.fleet_totals))
+    cases.append(('train_and_forecast', lambda: train_and_forecast(portfolio, save=False)))
+    if sites and sites <= BATCH_FORECAST_MAX_SITES:
+        cases.append(('train_and_forecast_batch', lambda: train_and_forecast_batch(df, mode='pooled')))
+
+    if sites:
+        cases += [
+            ('site_kpis', lambda: site_kpis(df)),
+            ('optimize_energy_grid', lambda: optimize_energy_grid(
+                kpis['annual_energy_kwh'].to_numpy(), kpis['annual_cost'].to_numpy(),
+                kpis['annual_emission'].to_numpy(), np.arange(1, 51))),
+            ('generate_recommendation', lambda: [
+                generate_recommendation(trend, level)
+                for trend, level in zip(kpis['cost_trend_pct'], kpis['emission_level'])]),
+            ('fleet_recommendations', lambda: fleet_recommendations(df, kpis=kpis)),
+        ]
+    else:
+        energy = portfolio['energy_consumption_kwh'].tail(12).sum()
+        cost = portfolio['total_cost'].tail(12).sum()
+        emissions = portfolio['total_emission'].tail(12).sum()
+        cases += [
+            ('optimize_energy', lambda: [optimize_energy(energy, cost, emissions, pct, strategy)
+                                         for strategy in STRATEGIES for pct in range(1, 51)]),
+            ('generate_recommendation', lambda: [generate_recommendation(trend, level)
+                                                 for trend in (-3.0, 8.0) for level in ('High', 'Medium')]),
+        ]
+    return cases
+
+
+def _load_cases(df, tmp):
+    """
+    The CSV ingest path: a cold load builds the Parquet cache, a warm one reads it.
+    """
+    path = os.path.join(tmp, 'meters.csv')
+    df.to_csv(path, index=False)
+
+    def cold():
+        cache = f"{path}.parquet"
+        if os.path.exists(cache):
+            os.remove(cache)
+        return load_csv(path)
+
+    return [('load_csv_cold', cold), ('load_csv_warm', lambda: load_csv(path))]
+
+
+def measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': min(times), 'peak_mb': peak / 2 ** 20}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Cases whose time or peak memory grew beyond tolerance, as printable lines.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if result[metric] > base[metric] * (1 + tolerance) and result[metric] - base[metric] > 0.01:
+                regressions.append(f"{key} {metric}: {base[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', choices=SCALES, default=['small', 'medium'])
+    parser.add_argument('--datasets', nargs='+', choices=DATASETS, help='run these datasets instead of --scales')
+    parser.add_argument('--filter', help='only cases whose name contains this string')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-rows', type=float, default=5e7, help='skip datasets larger than this')
+    parser.add_argument('--no-load', action='store_true', help='skip the CSV/Parquet loading cases')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown or memory growth')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='merge these results into the baseline file')
+    args = parser.parse_args()
+
+    names = args.datasets or [name for scale in args.scales for name in SCALES[scale]]
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'dataset':<24}{'case':<28}{'seconds':>10}{'peak MB':>10}{'baseline s':>12}")
+    for name in names:
+        rows = dataset_rows(name)
+        if rows > args.max_rows:
+            print(f"{name:<24}skipped: ~{rows:,.0f} rows exceeds --max-rows")
+            continue
+
+        months, sites, freq = DATASETS[name]
+        df = generate_synthetic_data(months, n_sites=sites, freq=freq)
+        with tempfile.TemporaryDirectory() as tmp:
+            cases = _cases(name, df) + ([] if args.no_load else _load_cases(df, tmp))
+            for case, func in cases:
+                if args.filter and args.filter not in case:
+                    continue
+                key = f"{name}/{case}"
+                results[key] = measure(func, args.repeat)
+                base = baseline.get(key, {}).get('seconds')
+                print(f"{name:<24}{case:<28}{results[key]['seconds']:>10.3f}{results[key]['peak_mb']:>10.1f}"
+                      f"{'' if base is None else f'{base:.3f}':>12}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+        print(f"\nbaseline updated: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        print('\n'.join(f"  {line}" for line in regressions))
+        sys.exit(1)
+    print(f"\nno regressions beyond {args.tolerance:.0%} ({len(baseline)} baseline entries)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.backtesting import _feature_matrix, backtest, backtest_backends, rolling_origin_folds
+from utils.data_loader import generate_synthetic_data
+from utils.forecasting import TARGET, _matrix_features
+
+
+def test_rolling_origin_folds_split_by_date():
+    df = generate_synthetic_data(months=24, n_sites=3)
+    for train_rows, test_rows in rolling_origin_folds(df['date'], n_splits=4):
+        assert df['date'].iloc[train_rows].max() < df['date'].iloc[test_rows].min()
+
+
+def test_rolling_mean_excludes_target_month():
+    df = generate_synthetic_data(months=24)
+    X, y, _, columns = _feature_matrix(df)
+    y_all = df[TARGET].to_numpy()
+    offset = len(y_all) - len(y)
+    trailing = np.array([y_all[i - 3:i].mean() for i in range(offset, len(y_all))])
+    np.testing.assert_allclose(X[:, columns.index('rolling_mean_3m')], trailing)
+
+
+def test_backtest_leaderboard_covers_every_pair():
+    df = generate_synthetic_data(months=36)
+    leaderboard, fold_timings, _ = backtest(df, n_splits=3, n_jobs=1)
+    assert len(leaderboard) == 4 * 3
+    assert fold_timings['mae'].notna().all()
+
+
+def test_backtest_backends_rejects_too_few_months():
+    df = generate_synthetic_data(months=24)
+    with pytest.raises(ValueError, match='cannot hold'):
+        backtest_backends(df, n_splits=5, horizon=12)
+    with pytest.raises(ValueError, match='cannot hold'):
+        backtest_backends(df, backends=['holt_winters'], n_splits=5, horizon=3)
+    leaderboard, _ = backtest_backends(df, backends=['ridge'], n_splits=5, horizon=3)
+    assert leaderboard['mae_mean'].notna().all()
+
+
+def test_backend_comparison_uses_no_target_month():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1000, 100, (3, 24))
+    last_dates = pd.DatetimeIndex(['2024-12-01'] * 3)
+    X, y = _matrix_features(values, last_dates)
+
+    # Changing the last month may only change the rows it is the target of.
+    changed = values.copy()
+    changed[:, -1] += 500
+    X_changed, y_changed = _matrix_features(changed, last_dates)
+    np.testing.assert_array_equal(X_changed, X)
+    assert (y_changed != y).sum() == 3
+
+    # The mean feature is the trailing mean the backtest scores feature sets on.
+    df = pd.DataFrame({'date': pd.date_range('2023-01-01', periods=24, freq='MS'), TARGET: values[0]})
+    X_frame, y_frame, _, columns = _feature_matrix(df)
+    np.testing.assert_allclose(X[:len(y_frame), 3], X_frame[:, columns.index('rolling_mean_3m')])
+    np.testing.assert_allclose(y[:len(y_frame)], y_frame)
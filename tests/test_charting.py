@@ -0,0 +1,35 @@
+import threading
+
+import numpy as np
+
+from utils.charting import ChartCache, downsample
+
+
+def test_lttb_keeps_endpoints_and_budget():
+    x = np.arange(10_000)
+    y = np.sin(x / 100.0)
+    xs, ys = downsample(x, y, 500, 'lttb')
+    assert len(xs) == len(ys) == 500
+    assert xs[0] == x[0] and xs[-1] == x[-1]
+
+
+def test_chart_cache_is_thread_safe():
+    cache = ChartCache(max_entries=8)
+    errors = []
+
+    def worker(seed):
+        rng = np.random.default_rng(seed)
+        try:
+            for key in rng.integers(0, 32, 20_000):
+                if cache.get(int(key)) is None:
+                    cache.put(int(key), key)
+        except Exception as exc:  # KeyError from an unguarded OrderedDict
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(cache._entries) <= 8
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from utils import data_loader
+from utils.data_loader import build_columnar_cache, generate_synthetic_data, iter_data_chunks, load_data
+
+HEADER = 'date,energy_consumption_kwh,cost_per_kwh,total_cost,emission_factor,total_emission\n'
+
+
+def test_load_data_round_trip(tmp_path):
+    path = tmp_path / 'meters.csv'
+    df = generate_synthetic_data(months=12)
+    df.to_csv(path, index=False)
+    loaded = load_data(str(path))
+    assert len(loaded) == len(df)
+    assert os.path.exists(f"{path}.parquet")
+
+
+def test_load_data_missing_path_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_data(str(tmp_path / 'typo.csv'))
+
+
+def test_load_data_bad_values_raise(tmp_path):
+    path = tmp_path / 'meters.csv'
+    path.write_text(HEADER + '2024-01-01,not-a-number,0.1,1,0.4,1\n')
+    with pytest.raises(ValueError):
+        load_data(str(path))
+
+
+def test_failed_cache_build_leaves_no_temp_file(tmp_path):
+    path = tmp_path / 'meters.csv'
+    path.write_text(HEADER + '2024-01-01,10,0.1,1,0.4,4\n' + '2024-02-01,oops,0.1,1,0.4,4\n')
+    with pytest.raises(ValueError):
+        build_columnar_cache(str(path), chunksize=1)
+    assert os.listdir(tmp_path) == ['meters.csv']
+
+
+def test_header_only_csv_yields_no_rows(tmp_path, monkeypatch):
+    path = tmp_path / 'empty.csv'
+    path.write_text(HEADER)
+    assert sum(len(chunk) for chunk in iter_data_chunks(str(path))) == 0
+    assert load_data(str(path)).empty
+
+    # Some pandas versions yield no chunk at all for a header-only file.
+    os.remove(f"{path}.parquet")
+    monkeypatch.setattr(data_loader, '_read_csv_chunks', lambda filepath, chunksize: iter([]))
+    assert build_columnar_cache(str(path)) is None
+    assert list(iter_data_chunks(str(path))) == []
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_loader import generate_synthetic_data
+from utils.feature_engineering import create_features, feature_columns, history_tail, update_features
+
+
+@pytest.mark.parametrize('freq, months, group_col', [
+    ('MS', 36, None),
+    ('15min', 1, None),
+    ('MS', 36, 'site_id'),
+    ('h', 2, 'site_id'),
+])
+def test_update_features_matches_create_features(freq, months, group_col):
+    if group_col is None:
+        df = generate_synthetic_data(months, freq=freq)
+    else:
+        df = generate_synthetic_data(months, n_sites=3, freq=freq)
+    dates = np.sort(df['date'].unique())
+    cut = dates[len(dates) * 3 // 4]
+    history, new_rows = df[df['date'] < cut], df[df['date'] >= cut]
+
+    tail = history_tail(create_features(history, group_col=group_col, freq=freq),
+                        freq=freq, group_col=group_col)
+    # Two batches, so the tail returned by the first call is used as context.
+    half = new_rows['date'] < dates[len(dates) * 7 // 8]
+    first, tail = update_features(tail, new_rows[half], freq=freq, group_col=group_col)
+    second, _ = update_features(tail, new_rows[~half], freq=freq, group_col=group_col)
+    streamed = pd.concat([first, second], ignore_index=True)
+
+    full = create_features(df, group_col=group_col, freq=freq)
+    expected = full[full['date'] >= cut].reset_index(drop=True)
+    if group_col is not None:
+        streamed = streamed.sort_values([group_col, 'date'], ignore_index=True)
+        expected = expected.sort_values([group_col, 'date'], ignore_index=True)
+    columns = feature_columns(freq)
+    np.testing.assert_allclose(streamed[columns].to_numpy(dtype=float),
+                               expected[columns].to_numpy(dtype=float))
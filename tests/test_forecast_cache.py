@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+from utils.data_loader import generate_synthetic_data
+from utils.forecast_cache import ForecastCache, fingerprint
+
+
+def test_disk_tier_is_shared_across_processes(tmp_path):
+    code = (
+        "import sys; from utils.data_loader import generate_synthetic_data; "
+        "from utils.forecast_cache import ForecastCache; "
+        "ForecastCache(cache_dir=sys.argv[1]).get_or_compute("
+        "generate_synthetic_data(24), save=False, backend='seasonal_naive')"
+    )
+    subprocess.run([sys.executable, '-c', code, str(tmp_path)], check=True)
+
+    def compute(df, **kwargs):
+        raise AssertionError("cache miss: the other process already stored this forecast")
+
+    cache = ForecastCache(cache_dir=str(tmp_path))
+    forecast, mae = cache.get_or_compute(generate_synthetic_data(24), compute=compute,
+                                         save=False, backend='seasonal_naive')
+    assert len(forecast) == 3
+    assert cache.stats == {'memory_hits': 0, 'disk_hits': 1, 'misses': 0}
+
+
+def test_key_changes_with_horizon_and_backend():
+    df = generate_synthetic_data(24)
+    base = fingerprint(df, options={'horizon': 3, 'backend': 'ridge'})
+    assert fingerprint(df, options={'horizon': 3, 'backend': 'ridge'}) == base
+    assert fingerprint(df, options={'horizon': 6, 'backend': 'ridge'}) != base
+    assert fingerprint(df, options={'horizon': 3, 'backend': 'holt_winters'}) != base
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import model_store
+from utils.aggregation import portfolio_monthly
+from utils.data_loader import generate_synthetic_data
+from utils.forecast_cache import fingerprint
+from utils.forecasting import (BACKENDS, MODEL_NAME, TARGET, load_model, train_and_forecast,
+                               train_and_forecast_batch, update_model)
+
+
+@pytest.fixture(scope='module')
+def fleet():
+    return generate_synthetic_data(months=36, n_sites=6)
+
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+def test_every_backend_forecasts_with_interval(fleet, backend):
+    forecast, mae = train_and_forecast(portfolio_monthly(fleet), save=False, horizon=6,
+                                       interval=0.9, backend=backend)
+    assert len(forecast) == 6
+    assert np.isfinite(mae)
+    assert (forecast['lower'] <= forecast[TARGET]).all() and (forecast[TARGET] <= forecast['upper']).all()
+
+
+@pytest.mark.parametrize('strategy', ['recursive', 'direct'])
+def test_pooled_ridge_ignores_series_labels(fleet, strategy):
+    # Shuffle the site labels (not an affine relabeling): a linear slope on the
+    # series code would change the forecasts.
+    sites = fleet['site_id'].astype(str)
+    labels = sorted(sites.unique())
+    shuffled = [labels[i] for i in (2, 5, 0, 4, 1, 3)]
+    relabeled = fleet.assign(site_id=sites.map(dict(zip(labels, shuffled))))
+
+    forecast, _ = train_and_forecast_batch(fleet, mode='pooled', backend='ridge', strategy=strategy)
+    other, _ = train_and_forecast_batch(relabeled, mode='pooled', backend='ridge', strategy=strategy)
+    other['site_id'] = other['site_id'].astype(str).map(dict(zip(shuffled, labels)))
+
+    merged = forecast.assign(site_id=forecast['site_id'].astype(str)).merge(other, on=['site_id', 'date'])
+    np.testing.assert_allclose(merged[f'{TARGET}_x'], merged[f'{TARGET}_y'])
+
+
+def test_fingerprint_rejects_unknown_backend():
+    df = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=3, freq='MS'), TARGET: [1.0, 2.0, 3.0]})
+    with pytest.raises(ValueError, match='Unknown forecasting backend'):
+        fingerprint(df, options={'backend': 'prophet'})
+
+
+@pytest.mark.parametrize('backend', ['random_forest', 'hist_gradient_boosting', 'ridge'])
+def test_pooled_direct_holds_out_complete_rows(backend):
+    df = generate_synthetic_data(months=24, n_sites=3)
+    forecast, mae = train_and_forecast_batch(df, mode='pooled', strategy='direct', horizon=6,
+                                             backend=backend)
+    assert len(forecast) == 3 * 6
+    assert mae.notna().all()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, 'MODELS_DIR', str(tmp_path))
+    model_store.clear_loaded()
+    yield tmp_path
+    model_store.clear_loaded()
+
+
+@pytest.fixture
+def months():
+    df = generate_synthetic_data(months=36)[['date', TARGET]]
+    return df.iloc[:-2], df.iloc[-2:]
+
+
+def test_update_model_without_new_rows_keeps_model(store, months):
+    history, _ = months
+    train_and_forecast(history)
+    model, info = update_model(history, history.iloc[:0])
+    assert info['reason'] == 'no new rows' and not info['refit']
+    assert len(model.estimators_) == 100
+
+
+def test_update_model_warm_starts_extra_trees(store, months):
+    history, new_rows = months
+    train_and_forecast(history)
+    model, info = update_model(history, new_rows, drift_threshold=np.inf)
+    assert not info['refit'] and info['n_estimators'] == 120
+    assert len(load_model().estimators_) == 120
+    assert model_store.load_meta(MODEL_NAME)['recent_mae'] > 0
+
+
+def test_update_model_refits_on_drift(store, months):
+    history, new_rows = months
+    train_and_forecast(history)
+    model, info = update_model(history, new_rows, drift_threshold=-1.0)
+    assert info['refit'] and info['reason'] == 'drift'
+    assert len(model.estimators_) == 100
+
+
+def test_update_model_refits_without_stored_model(store, months):
+    history, new_rows = months
+    model, info = update_model(history, new_rows)
+    assert info['refit'] and info['reason'] == 'no incremental model'
+    assert model is not None
+
+
+def test_update_model_refits_on_zero_baseline(store, months):
+    history, new_rows = months
+    train_and_forecast(history)
+    model_store.save_model(load_model(), MODEL_NAME, meta={
+        **model_store.load_meta(MODEL_NAME), 'baseline_mae': 0.0})
+    _, info = update_model(history, new_rows)
+    assert info['refit'] and info['reason'] == 'drift'
@@ -0,0 +1,29 @@
+import os
+import threading
+
+from utils.instrumentation import span, write_prometheus
+
+
+def test_concurrent_prometheus_writes(tmp_path):
+    path = str(tmp_path / 'energy_ai.prom')
+    with span('test.write_prometheus'):
+        pass
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(200):
+                write_prometheus(path)
+        except Exception as exc:  # FileNotFoundError from a shared temp name
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(tmp_path) == ['energy_ai.prom']
+    with open(path) as f:
+        assert 'span="test.write_prometheus"' in f.read()
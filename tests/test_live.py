@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from utils.live import LIVE_COLUMNS, LiveState
+
+
+def _batch(timestamps, values, meter='m1'):
+    return pd.DataFrame({'timestamp': timestamps, 'meter_id': meter,
+                         'energy_consumption_kwh': values}, columns=LIVE_COLUMNS)
+
+
+def test_window_sum_tracks_newest_readings():
+    state = LiveState(max_meters=4, capacity=3)
+    state.ingest(_batch([0, 900, 1800, 2700, 3600], [1.0, 2.0, 3.0, 4.0, 5.0]))
+    kpis = state.kpis()
+    assert kpis['window_kwh'] == 12.0
+    assert kpis['lifetime_kwh'] == 15.0
+
+
+def test_blank_reading_does_not_poison_sums():
+    state = LiveState(max_meters=4, capacity=3)
+    state.ingest(_batch([0], [np.nan]))
+    for i in range(1, 6):
+        state.ingest(_batch([i * 900], [float(i)]))
+    kpis = state.kpis()
+    assert kpis['window_kwh'] == 3.0 + 4.0 + 5.0
+    assert kpis['lifetime_kwh'] == 15.0
+    assert np.isfinite(state.fleet.frame()['energy_consumption_kwh']).all()
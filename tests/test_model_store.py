@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from utils import model_store
+
+
+def _objects(root):
+    return sorted(name for name in os.listdir(os.path.join(root, 'objects')) if name.endswith('.joblib'))
+
+
+def test_old_versions_are_pruned_unless_referenced(tmp_path):
+    root = str(tmp_path)
+    versions = [model_store.save_model({'weights': np.full(4, i)}, 'site_a', root=root)
+                for i in range(model_store.KEEP_VERSIONS + 2)]
+    # site_b points at the oldest version, so it survives site_a's pruning.
+    model_store.save_model({'weights': np.full(4, 0)}, 'site_b', root=root)
+    latest = model_store.save_model({'weights': np.full(4, 99)}, 'site_a', root=root)
+
+    history = model_store.read_ref('site_a', root)['history']
+    assert history == [latest] + versions[::-1][:model_store.KEEP_VERSIONS - 1]
+    assert versions[0] in [os.path.splitext(name)[0] for name in _objects(root)]
+    assert model_store.load_model('site_a', version=versions[1], root=root) is None
+    assert len(_objects(root)) == model_store.KEEP_VERSIONS + 1
+    np.testing.assert_array_equal(model_store.load_model('site_a', root=root, cache=False)['weights'], 99)
+
+
+def test_mmap_load_maps_arrays_unless_compressed(tmp_path):
+    root = str(tmp_path)
+    model = {'weights': np.arange(100_000, dtype=float)}
+    model_store.save_model(model, 'plain', root=root)
+    model_store.save_model(model, 'packed', compress=3, root=root)
+
+    mapped = model_store.load_model('plain', mmap_mode='r', root=root, cache=False)
+    assert isinstance(mapped['weights'], np.memmap)
+    np.testing.assert_array_equal(mapped['weights'], model['weights'])
+
+    packed = model_store.load_model('packed', mmap_mode='r', root=root, cache=False)
+    assert not isinstance(packed['weights'], np.memmap)
+    np.testing.assert_array_equal(packed['weights'], model['weights'])
@@ -0,0 +1,43 @@
+import numpy as np
+
+from utils.optimization import (STRATEGIES, TYPICAL_DAILY_PROFILE, optimize_energy, optimize_energy_grid,
+                                optimize_load_shift, tou_tariff)
+
+
+def _fleet(n_sites=5, days=3):
+    rng = np.random.default_rng(0)
+    profile = np.resize(TYPICAL_DAILY_PROFILE * 200, 24 * days)
+    return profile * rng.uniform(0.5, 2.0, (n_sites, 1)) * rng.uniform(0.9, 1.1, (n_sites, 24 * days))
+
+
+def test_grid_matches_scalar_optimizer():
+    energy = np.array([120_000.0, 80_000.0, 0.0])
+    cost, emissions = energy * 0.13, energy * 0.4
+    reductions = [0, 5, 12.5, 30]
+    grid = optimize_energy_grid(energy, cost, emissions, reductions)
+    assert len(grid) == len(energy) * len(STRATEGIES) * len(reductions)
+
+    columns = ['new_energy', 'new_cost', 'new_emissions', 'annual_savings', 'roi', 'investment']
+    for row in grid.itertuples():
+        site = row.site
+        expected = optimize_energy(energy[site], cost[site], emissions[site], row.reduction_pct, row.strategy)
+        np.testing.assert_allclose([getattr(row, c) for c in columns], [expected[c] for c in columns])
+
+
+def test_load_shift_preserves_window_energy():
+    load = _fleet()
+    tariff = tou_tariff(load.shape[1])
+    for capacity in (None, 4.0, 1e9):
+        shifted, _ = optimize_load_shift(load, tariff, capacity=capacity)
+        np.testing.assert_allclose(shifted.reshape(len(load), -1, 24).sum(axis=-1),
+                                   load.reshape(len(load), -1, 24).sum(axis=-1))
+
+
+def test_load_shift_low_capacity_keeps_unplaceable_load():
+    load = _fleet()
+    tariff = tou_tariff(load.shape[1])
+    shifted, metrics = optimize_load_shift(load, tariff, capacity=4.0)
+    # No hour rises above the larger of its own load and the capacity.
+    assert (shifted <= np.maximum(load, 4.0) + 1e-9).all()
+    _, default = optimize_load_shift(load, tariff)
+    assert metrics['savings'].sum() <= default['savings'].sum() + 1e-9
@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+from utils.pipeline import LATEST_FILE, MANIFEST_FILE, load_artifacts, parse_args, run_pipeline
+
+
+def _run(artifacts_dir, *argv):
+    return run_pipeline(parse_args([
+        '--artifacts-dir', str(artifacts_dir), '--run-id', 'test', '--synthetic-sites', '3',
+        '--forecast-mode', 'pooled', '--n-jobs', '1', *argv,
+    ]))
+
+
+def test_bad_data_path_fails_without_publishing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        _run(tmp_path, '--data', str(tmp_path / 'missing.csv'))
+    assert not os.path.exists(tmp_path / LATEST_FILE)
+
+
+def test_resume_recomputes_stages_when_inputs_change(tmp_path):
+    run_dir = _run(tmp_path, '--forecast-backend', 'seasonal_naive')
+    first = load_artifacts(run_dir)
+    assert first['kpis']['site_id'].nunique() == 3
+
+    # Same inputs: everything is reused.
+    _run(tmp_path, '--forecast-backend', 'seasonal_naive', '--resume')
+    with open(os.path.join(run_dir, MANIFEST_FILE)) as f:
+        assert json.load(f)['inputs']['forecast_backend'] == 'seasonal_naive'
+
+    # A different site filter invalidates every stage.
+    _run(tmp_path, '--forecast-backend', 'seasonal_naive', '--resume', '--sites', 'site_00000')
+    assert load_artifacts(run_dir)['kpis']['site_id'].tolist() == ['site_00000']
+
+    # A different backend invalidates the forecast stages only.
+    before = load_artifacts(run_dir)['manifest']['stages']
+    _run(tmp_path, '--forecast-backend', 'holt_winters', '--resume', '--sites', 'site_00000')
+    artifacts = load_artifacts(run_dir)
+    after = artifacts['manifest']['stages']
+    assert artifacts['manifest']['forecast_backend'] == 'holt_winters'
+    assert [stage for stage in after if after[stage] != before[stage]] == ['forecast', 'portfolio_forecast']
@@ -0,0 +1,38 @@
+import numpy as np
+
+from benchmarks.bench_recommendation import loop_recommendations
+from utils.aggregation import site_monthly
+from utils.data_loader import generate_synthetic_data
+from utils.recommendation import fleet_recommendations
+
+
+def _fleet_with_spike():
+    """
+    Synthetic fleet where one otherwise nominal site has a spike in its latest month.
+    """
+    df = generate_synthetic_data(months=36, n_sites=40)
+    nominal = fleet_recommendations(df).query("strategy == 'Monitor'").index[0]
+    spike = (df['site_id'] == nominal) & (df['date'] == df['date'].max())
+    df.loc[spike, 'energy_consumption_kwh'] *= 3
+    return df, nominal
+
+
+def test_fleet_recommendations_match_per_site_loop():
+    df, _ = _fleet_with_spike()
+    table = fleet_recommendations(df)
+    monthly = site_monthly(df)
+    sites = list(monthly['site_id'].cat.categories)
+
+    loop = {site: (strategy, z) for site, strategy, z in loop_recommendations(monthly, sites)}
+    strategy = table['strategy'].astype(str).replace('Investigate Anomaly', 'Monitor')
+    assert strategy.to_dict() == {site: s for site, (s, _) in loop.items()}
+    np.testing.assert_allclose(table.loc[sites, 'energy_z'], [z for _, z in loop.values()])
+
+
+def test_anomaly_only_site_is_investigated():
+    df, nominal = _fleet_with_spike()
+    table = fleet_recommendations(df)
+    site = table.loc[nominal]
+    assert site['anomaly'] and site['action_required']
+    assert site['strategy'] == 'Investigate Anomaly'
+    assert not table.loc[table['strategy'] == 'Monitor', 'anomaly'].any()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from utils.aggregation import fleet_totals, site_kpis
+from utils.data_loader import generate_synthetic_data
+from utils.rollup import RollupCube
+
+
+@pytest.fixture
+def fleet():
+    return generate_synthetic_data(months=24, n_sites=5)
+
+
+def _assert_parity(df):
+    expected = fleet_totals(site_kpis(df))
+    actual = RollupCube.from_frame(df, grains=('month',)).fleet_totals()
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        assert actual[key] == pytest.approx(expected[key])
+
+
+def test_fleet_totals_match_aggregation(fleet):
+    _assert_parity(fleet)
+
+
+def test_fleet_totals_skip_missing_readings(fleet):
+    fleet.loc[fleet.index[[3, 40, 77]], 'total_cost'] = np.nan
+    fleet.loc[fleet.index[10], 'energy_consumption_kwh'] = np.nan
+    _assert_parity(fleet)
+    assert np.isfinite(list(RollupCube.from_frame(fleet).fleet_totals().values())).all()
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+import threading
+
+from utils.forecast_cache import ForecastCache
+
+
+def test_importing_serving_leaves_pandas_options_alone():
+    code = (
+        "import pandas as pd; before = pd.get_option('mode.copy_on_write'); "
+        "import utils.serving; assert pd.get_option('mode.copy_on_write') == before"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_forecast_cache_counts_every_lookup(tmp_path):
+    cache = ForecastCache(cache_dir=str(tmp_path), max_entries=4)
+    cache.put('warm', 1)
+    disk = ForecastCache(cache_dir=str(tmp_path), max_entries=4)
+
+    def worker(target):
+        for i in range(2_000):
+            target.get('warm' if i % 2 else f'cold-{i}')
+
+    threads = [threading.Thread(target=worker, args=(target,))
+               for target in (cache, disk) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for target in (cache, disk):
+        assert sum(target.stats.values()) == 4 * 2_000
+        assert target.stats['misses'] == 4 * 1_000
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from utils.simulation import residual_bootstrap, simulate_scenarios
+
+
+def _scenarios(seed):
+    energy = np.array([120_000.0, 80_000.0])
+    return simulate_scenarios(energy, energy * 0.13, energy * 0.4, [5, 15, 30],
+                              n_samples=20_000, seed=seed, chunk_size=4)
+
+
+def test_seeded_simulation_is_reproducible():
+    pd.testing.assert_frame_equal(_scenarios(7), _scenarios(7))
+    assert not _scenarios(7)['annual_savings_q05'].equals(_scenarios(8)['annual_savings_q05'])
+    np.testing.assert_array_equal(residual_bootstrap([1.0, 2.0, 3.0], [-1.0, 0.5, 2.0], 500, seed=3),
+                                  residual_bootstrap([1.0, 2.0, 3.0], [-1.0, 0.5, 2.0], 500, seed=3))
+
+
+def test_simulated_quantiles_are_ordered():
+    scenarios = _scenarios(0)
+    for metric in ('annual_savings', 'new_cost', 'new_emissions', 'roi'):
+        q05, q50, q95 = (scenarios[f"{metric}_{q}"] for q in ('q05', 'q50', 'q95'))
+        assert (q05 <= q50).all() and (q50 <= q95).all()
+    # Spread around the point estimate wherever there are savings.
+    saving = scenarios['annual_savings'] > 0
+    assert (scenarios.loc[saving, 'annual_savings_q05'] < scenarios.loc[saving, 'annual_savings']).all()
+    assert (scenarios.loc[saving, 'annual_savings'] < scenarios.loc[saving, 'annual_savings_q95']).all()
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from .instrumentation import timed
+
+SITE_KEY = 'site_id'
+METRICS = ['energy_consumption_kwh', 'total_cost', 'total_emission']
+
+
+def site_monthly(df):
+    """
+    Collapse meters into one row per site and month, sorted by site then date.
+    Frames without a site_id column are treated as a single site.
+    """
+    if SITE_KEY not in df.columns:
+        df = df.assign(**{SITE_KEY: 'site_00000'})
+
+    monthly = (
+        df.groupby([SITE_KEY, 'date'], observed=True, sort=True)[METRICS]
+        .sum()
+        .reset_index()
+    )
+    return monthly
+
+
+@timed()
+def site_kpis(df, trailing_months=12):
+    """
+    KPI table with one row per site, computed in a single grouped pass.
+
+    Columns:
+    - total_energy_kwh / total_cost / total_emission: whole history
+    - annual_energy_kwh / annual_cost / annual_emission: trailing window
+    - cost_trend_pct: last month vs previous month cost (0 if fewer than 2 months)
+    - emission_level: "High" if last month's emission is above the site mean
+    """
+    monthly = site_monthly(df)
+    groups = monthly.groupby(SITE_KEY, observed=True, sort=False)
+
+    totals = groups[METRICS].sum()
+    totals.columns = ['total_energy_kwh', 'total_cost', 'total_emission']
+
+    # Position counted from the most recent month of each site (0 = latest).
+    from_end = groups.cumcount(ascending=False).to_numpy()
+
+    trailing = (
+        monthly.loc[from_end < trailing_months]
+        .groupby(SITE_KEY, observed=True, sort=False)[METRICS]
+        .sum()
+    )
+    trailing.columns = ['annual_energy_kwh', 'annual_cost', 'annual_emission']
+
+    last = monthly.loc[from_end == 0].set_index(SITE_KEY)
+    prev = monthly.loc[from_end == 1].set_index(SITE_KEY)['total_cost']
+    prev = prev.reindex(last.index)
+
+    last_cost = last['total_cost'].to_numpy()
+    prev_cost = prev.to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend = (last_cost - prev_cost) / prev_cost * 100
+    trend = np.where(np.isfinite(trend), trend, 0.0)
+
+    mean_emission = groups['total_emission'].mean().reindex(last.index)
+    emission_level = np.where(
+        last['total_emission'].to_numpy() > mean_emission.to_numpy(), 'High', 'Normal'
+    )
+
+    kpis = totals.join(trailing)
+    kpis['last_month_cost'] = pd.Series(last_cost, index=last.index)
+    kpis['cost_trend_pct'] = pd.Series(trend, index=last.index)
+    kpis['emission_level'] = pd.Series(emission_level, index=last.index)
+    kpis['months'] = groups.size()
+    return kpis
+
+
+def fleet_totals(kpis):
+    """
+    Sum site-level KPIs into portfolio totals.
+    """
+    cols = [
+        'total_energy_kwh', 'total_cost', 'total_emission',
+        'annual_energy_kwh', 'annual_cost', 'annual_emission',
+    ]
+    return kpis[cols].sum().to_dict()
+
+
+@timed()
+def portfolio_monthly(df):
+    """
+    One monthly series summed across all sites and meters.
+    """
+    if SITE_KEY not in df.columns and 'meter_id' not in df.columns:
+        return df
+    portfolio = df.groupby('date', sort=True)[METRICS].sum().reset_index()
+    portfolio['cost_per_kwh'] = portfolio['total_cost'] / portfolio['energy_consumption_kwh']
+    return portfolio
@@ -0,0 +1,271 @@
+import argparse
+import pickle
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit
+
+from .data_loader import load_data
+from .feature_engineering import create_features
+from .forecasting import (BACKENDS, FEATURES, MODEL_PARAMS, TARGET, check_backend, history_matrix,
+                          make_forecaster, series_frame, trailing_rolling_mean)
+
+ESTIMATORS = {
+    'random_forest': RandomForestRegressor,
+    'extra_trees': ExtraTreesRegressor,
+    'hist_gradient_boosting': HistGradientBoostingRegressor,
+}
+
+DEFAULT_CONFIGS = [
+    {'name': 'rf_100', 'model': 'random_forest', 'params': MODEL_PARAMS},
+    {'name': 'rf_50_depth8', 'model': 'random_forest',
+     'params': {'n_estimators': 50, 'max_depth': 8, 'random_state': 42}},
+    {'name': 'extra_trees_100', 'model': 'extra_trees',
+     'params': {'n_estimators': 100, 'random_state': 42}},
+    {'name': 'hgb', 'model': 'hist_gradient_boosting',
+     'params': {'max_iter': 200, 'random_state': 42}},
+]
+
+# rolling_mean_3m from create_features includes the target month itself; the
+# backtest shifts it by one month (forecasting.trailing_rolling_mean) so every
+# set is scored on the same trailing mean recursive_forecast feeds the model at
+# predict time.
+FEATURE_SETS = {
+    'calendar_lag': FEATURES,
+    'lag_only': ['lag_1m', 'rolling_mean_3m'],
+    'calendar_lag1': ['month', 'year', 'lag_1m'],
+}
+
+
+def rolling_origin_folds(dates, n_splits=5, test_size=None):
+    """
+    Rolling-origin (expanding window) folds over the distinct dates of a frame.
+    Every row sharing a date lands in the same fold, so pooled multi-site
+    frames are split by time rather than by row.
+
+    Returns a list of (train_rows, test_rows) index arrays.
+    """
+    unique_dates, date_rank = np.unique(np.asarray(dates), return_inverse=True)
+    splitter = TimeSeriesSplit(n_splits=n_splits, test_size=test_size)
+
+    folds = []
+    for train_dates, test_dates in splitter.split(unique_dates):
+        train_rows = np.flatnonzero(date_rank <= train_dates[-1])
+        test_rows = np.flatnonzero((date_rank >= test_dates[0]) & (date_rank <= test_dates[-1]))
+        folds.append((train_rows, test_rows))
+    return folds
+
+
+def _feature_matrix(df, group_col=None):
+    """
+    Featurize once; every fold and configuration slices the same arrays.
+    """
+    df_features = create_features(df, group_col=group_col)
+    df_features['rolling_mean_3m'] = trailing_rolling_mean(df_features, group_col)
+    columns = sorted({c for cols in FEATURE_SETS.values() for c in cols})
+    if group_col is not None:
+        df_features['series_code'] = df_features[group_col].astype('category').cat.codes
+        columns.append('series_code')
+
+    df_clean = df_features.dropna(subset=columns).reset_index(drop=True)
+    X = df_clean[columns].to_numpy(dtype=float)
+    y = df_clean[TARGET].to_numpy(dtype=float)
+    return X, y, df_clean['date'].to_numpy(), columns
+
+
+def _run_fold(config, feature_cols, X, y, train_rows, test_rows):
+    estimator = ESTIMATORS[config['model']](**config['params'])
+    X_train = X[np.ix_(train_rows, feature_cols)]
+    X_test = X[np.ix_(test_rows, feature_cols)]
+
+    t0 = time.perf_counter()
+    estimator.fit(X_train, y[train_rows])
+    fit_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    pred = estimator.predict(X_test)
+    predict_s = time.perf_counter() - t0
+
+    return float(np.mean(np.abs(pred - y[test_rows]))), fit_s, predict_s
+
+
+def backtest(df, configs=None, feature_sets=None, n_splits=5, test_size=None,
+             group_col=None, n_jobs=-1):
+    """
+    Rolling-origin evaluation of every (configuration, feature set) pair.
+
+    Folds run in parallel through joblib; the feature matrix is built once and
+    shared by all tasks (joblib memory-maps large arrays for worker processes).
+    With group_col set, all series are pooled and a series code is added to
+    every feature set.
+
+    Returns (leaderboard, fold_timings, wall_clock_s). The leaderboard is
+    sorted by mean MAE and includes mean fit/predict seconds per fold.
+    """
+    configs = DEFAULT_CONFIGS if configs is None else configs
+    feature_sets = FEATURE_SETS if feature_sets is None else feature_sets
+
+    t_start = time.perf_counter()
+    X, y, dates, columns = _feature_matrix(df, group_col)
+    folds = rolling_origin_folds(dates, n_splits=n_splits, test_size=test_size)
+
+    tasks = []
+    for config in configs:
+        for set_name, cols in feature_sets.items():
+            if group_col is not None:
+                cols = list(cols) + ['series_code']
+            col_idx = [columns.index(c) for c in cols]
+            for fold, (train_rows, test_rows) in enumerate(folds):
+                tasks.append((config, set_name, fold, col_idx, train_rows, test_rows))
+
+    results = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(_run_fold)(config, col_idx, X, y, train_rows, test_rows)
+        for config, _, _, col_idx, train_rows, test_rows in tasks
+    )
+    wall_clock_s = time.perf_counter() - t_start
+
+    fold_timings = pd.DataFrame([
+        {
+            'config': config['name'],
+            'feature_set': set_name,
+            'fold': fold,
+            'train_rows': len(train_rows),
+            'test_rows': len(test_rows),
+            'mae': mae,
+            'fit_s': fit_s,
+            'predict_s': predict_s,
+        }
+        for (config, set_name, fold, _, train_rows, test_rows), (mae, fit_s, predict_s)
+        in zip(tasks, results)
+    ])
+
+    fold_timings['task_s'] = fold_timings['fit_s'] + fold_timings['predict_s']
+
+    leaderboard = (
+        fold_timings.groupby(['config', 'feature_set'], sort=False)
+        .agg(mae_mean=('mae', 'mean'), mae_std=('mae', 'std'),
+             fit_s_mean=('fit_s', 'mean'), predict_s_mean=('predict_s', 'mean'),
+             total_s=('task_s', 'sum'))
+        .reset_index()
+        .sort_values('mae_mean', ignore_index=True)
+    )
+    return leaderboard, fold_timings, wall_clock_s
+
+
+def _value_matrix(df, group_col=None):
+    if group_col is None:
+        series_df = df.groupby('date', sort=True)[TARGET].sum().reset_index().assign(series='portfolio')
+        group_col = 'series'
+    else:
+        series_df = series_frame(df, group_col)
+    window = int(series_df.groupby(group_col, observed=True, sort=False).size().max())
+    values, _, last_dates = history_matrix(series_df, group_col, window=window)
+    return values, last_dates
+
+
+def backtest_backends(df, backends=None, n_splits=5, horizon=3, group_col=None):
+    """
+    Rolling-origin evaluation of forecasting backends (utils.forecasting.BACKENDS)
+    through their common fit/predict interface.
+
+    Each fold fits on the months before an origin and forecasts the next
+    `horizon` months of every series; the last n_splits origins are `horizon`
+    months apart. With group_col set, each series is forecast on its own
+    (feature backends pool the rows of all series into one regressor).
+
+    Folds run sequentially so fit/predict timings are not skewed by other
+    tasks. Memory is measured separately on the full history: peak_mb is the
+    tracemalloc peak of fit + predict (numpy and Python allocations; forest
+    tree nodes are allocated outside it), model_mb the pickled model size.
+
+    Returns (leaderboard, fold_timings) sorted by mean MAE.
+    """
+    backends = list(BACKENDS) if backends is None else backends
+    values, last_dates = _value_matrix(df, group_col)
+    n_months = values.shape[1]
+
+    # Series backends need a full season before the first origin, feature backends
+    # their lag window plus the target month.
+    min_train = 12 if any(check_backend(b)['kind'] == 'series' for b in backends) else 4
+    if n_months - n_splits * horizon < min_train:
+        raise ValueError(
+            f"{n_months} months cannot hold {n_splits} folds of {horizon} months after "
+            f"{min_train} training months; use fewer splits or a shorter horizon"
+        )
+
+    rows, memory = [], {}
+    for backend in backends:
+        for fold in range(n_splits):
+            origin = n_months - (n_splits - fold) * horizon
+            actual = values[:, origin:origin + horizon]
+            model = make_forecaster(backend)
+
+            t0 = time.perf_counter()
+            model.fit(values[:, :origin], last_dates - pd.DateOffset(months=n_months - origin))
+            fit_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            pred = model.predict(horizon)
+            predict_s = time.perf_counter() - t0
+
+            rows.append({
+                'backend': backend,
+                'fold': fold,
+                'train_months': origin,
+                'mae': float(np.nanmean(np.abs(pred - actual))),
+                'fit_s': fit_s,
+                'predict_s': predict_s,
+            })
+
+        tracemalloc.start()
+        model = make_forecaster(backend).fit(values, last_dates)
+        model.predict(horizon)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        memory[backend] = {'peak_mb': peak / 1e6, 'model_mb': len(pickle.dumps(model)) / 1e6}
+
+    fold_timings = pd.DataFrame(rows)
+    leaderboard = (
+        fold_timings.groupby('backend', sort=False)
+        .agg(mae_mean=('mae', 'mean'), mae_std=('mae', 'std'),
+             fit_s_mean=('fit_s', 'mean'), predict_s_mean=('predict_s', 'mean'))
+        .join(pd.DataFrame.from_dict(memory, orient='index'))
+        .reset_index()
+        .sort_values('mae_mean', ignore_index=True)
+    )
+    return leaderboard, fold_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of forecasting configurations.")
+    parser.add_argument('--data', help="CSV export to evaluate (synthetic data if omitted)")
+    parser.add_argument('--group-col', help="pool all series keyed by this column (e.g. site_id)")
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--backends', nargs='*', choices=list(BACKENDS),
+                        help="compare forecasting backends instead of configurations (all if none given)")
+    parser.add_argument('--horizon', type=int, default=3, help="months forecast per fold with --backends")
+    args = parser.parse_args()
+
+    if args.backends is not None:
+        leaderboard, fold_timings = backtest_backends(
+            load_data(args.data), backends=args.backends or None, n_splits=args.splits,
+            horizon=args.horizon, group_col=args.group_col
+        )
+        print(leaderboard.to_string(index=False))
+        return
+
+    leaderboard, fold_timings, wall_clock_s = backtest(
+        load_data(args.data), n_splits=args.splits, group_col=args.group_col, n_jobs=args.n_jobs
+    )
+    print(leaderboard.to_string(index=False))
+    print(f"\n{len(fold_timings)} fold fits, wall clock {wall_clock_s:.2f}s, "
+          f"summed task time {fold_timings['task_s'].sum():.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Chart data layer: reduce long series to a target number of points before they
+are serialized to the browser.
+
+    x, y = chart_series(df, 'date', 'energy_consumption_kwh', key='portfolio',
+                        x_range=(start, end))
+
+lttb (Largest-Triangle-Three-Buckets) keeps the visual shape of a line; minmax
+keeps the lowest and highest value of every bucket, so short spikes always
+survive. Results are cached per (series, range, resolution). Ranges are snapped
+outwards to a grid over the series span, so small pans reuse a cached slice,
+and a narrower range returns a finer slice for the same point budget.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .instrumentation import current_span, span
+
+DEFAULT_POINTS = 2000
+RANGE_GRID = 256  # x ranges snap to 1/RANGE_GRID of the full series span
+CACHE_SIZE = 128
+METHODS = ('lttb', 'minmax')
+
+
+def _as_int(x):
+    # Dates compare and interpolate as int64 nanoseconds.
+    return x.view(np.int64) if x.dtype.kind == 'M' else x
+
+
+def lttb(x, y, n_out):
+    """
+    Indices of n_out points chosen by Largest-Triangle-Three-Buckets.
+    x must be increasing; the first and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Bucket means, used as the fixed third corner of the triangle for the bucket before.
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        area = np.abs((x[prev] - avg_x[b + 1]) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (avg_y[b + 1] - y[prev]))
+        prev = lo + int(np.argmax(area))
+        keep[b + 1] = prev
+    return keep
+
+
+def minmax(y, n_out):
+    """
+    Sorted indices of the minimum and maximum of n_out // 2 equal-count buckets.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    n_buckets = max(n_out // 2, 1)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lo = offsets + np.nanargmin(blocks, axis=1)
+    hi = offsets + np.nanargmax(blocks, axis=1)
+    return np.unique(np.concatenate([lo, hi]))
+
+
+def downsample(x, y, n_out=DEFAULT_POINTS, method='lttb'):
+    """
+    Reduce (x, y) arrays to at most n_out points. NaN values are dropped first.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    ok = ~np.isnan(y)
+    if not ok.all():
+        x, y = x[ok], y[ok]
+    if len(y) <= n_out:
+        return x, y
+    idx = lttb(_as_int(x), y, n_out) if method == 'lttb' else minmax(y, n_out)
+    return x[idx], y[idx]
+
+
+def snap_range(x, x_range):
+    """
+    (lo, hi) int64 bounds of x_range widened to the RANGE_GRID grid over x's span.
+    """
+    xi = _as_int(x)
+    first, last = int(xi[0]), int(xi[-1])
+    lo, hi = (int(_as_int(np.asarray(v, dtype=x.dtype))) for v in x_range)
+    step = max((last - first) / RANGE_GRID, 1)
+    lo = first + int(np.floor((lo - first) / step) * step)
+    hi = first + int(np.ceil((hi - first) / step) * step)
+    return max(lo, first), min(hi, last)
+
+
+class ChartCache:
+    """
+    LRU of downsampled slices keyed by (series, column, range, points, method).
+    Shared by every session thread of a server, so all access takes a lock.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ChartCache()
+
+
+def series_token(x, y):
+    """
+    Cheap identity of a series (length, endpoints, sum): changes when new data
+    arrives without hashing every value.
+    """
+    if len(x) == 0:
+        return (0,)
+    return (len(x), x[0].item(), x[-1].item(), float(np.nansum(y)))
+
+
+def chart_series(frame, x_col, y_col, key=None, x_range=None, n_out=DEFAULT_POINTS,
+                 method='lttb', cache=None):
+    """
+    Downsampled (x, y) numpy arrays of frame[y_col] against frame[x_col].
+
+    frame must be sorted by x_col. x_range=(start, end) limits the slice to the
+    visible window. key names the series for the cache and must change when the
+    data does; without it a token of the data is used.
+    """
+    cache = _cache if cache is None else cache
+    x = frame[x_col].to_numpy()
+    y = frame[y_col].to_numpy(dtype=float)
+    if len(x) == 0:
+        return x, y
+
+    bounds = None if x_range is None else snap_range(x, x_range)
+    cache_key = (key if key is not None else series_token(x, y), y_col, bounds, n_out, method)
+
+    with span('charting.series', points=len(x), method=method):
+        result = cache.get(cache_key)
+        if result is not None:
+            current_span()['cache'] = 'hit'
+            return result
+        current_span()['cache'] = 'miss'
+        if bounds is not None:
+            xi = _as_int(x)
+            lo, hi = np.searchsorted(xi, bounds[0], 'left'), np.searchsorted(xi, bounds[1], 'right')
+            x, y = x[lo:hi], y[lo:hi]
+        result = downsample(x, y, n_out, method)
+        cache.put(cache_key, result)
+        return result
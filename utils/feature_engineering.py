@@ -1,29 +1,135 @@
 import pandas as pd
 
-def create_features(df):
+from .instrumentation import timed
+
+TARGET = 'energy_consumption_kwh'
+
+# Lags and rolling windows are expressed in rows of the given frequency.
+# 'MS' keeps the original monthly columns (lag_1m, rolling_mean_3m).
+FREQUENCY_SPECS = {
+    'MS': {
+        'calendar': ['month', 'year'],
+        'lags': {'lag_1m': 1},
+        'rolling': {'rolling_mean_3m': 3},
+    },
+    'D': {
+        'calendar': ['dayofweek', 'month', 'year'],
+        'lags': {'lag_1d': 1, 'lag_7d': 7},
+        'rolling': {'rolling_mean_7d': 7, 'rolling_mean_28d': 28},
+    },
+    'h': {
+        'calendar': ['hour', 'dayofweek', 'month', 'year'],
+        'lags': {'lag_1h': 1, 'lag_24h': 24, 'lag_168h': 168},
+        'rolling': {'rolling_mean_24h': 24, 'rolling_mean_168h': 168},
+    },
+    '15min': {
+        'calendar': ['hour', 'dayofweek', 'month', 'year'],
+        'lags': {'lag_15min': 1, 'lag_1h': 4, 'lag_24h': 96, 'lag_168h': 672},
+        'rolling': {'rolling_mean_1h': 4, 'rolling_mean_24h': 96, 'rolling_mean_168h': 672},
+    },
+}
+
+def _spec(freq):
+    try:
+        return FREQUENCY_SPECS[freq]
+    except KeyError:
+        raise ValueError(f"Unsupported frequency: {freq}. Expected one of {list(FREQUENCY_SPECS)}")
+
+def feature_columns(freq='MS'):
+    """
+    Names of the feature columns create_features adds for a frequency.
+    """
+    spec = _spec(freq)
+    return spec['calendar'] + list(spec['lags']) + list(spec['rolling'])
+
+def history_window(freq='MS'):
+    """
+    Rows of history needed to compute every lag and rolling feature of the newest row.
+    """
+    spec = _spec(freq)
+    return max(list(spec['lags'].values()) + list(spec['rolling'].values()))
+
+def _is_sorted(df, group_col):
+    keys = df[[group_col, 'date']]
+    if isinstance(keys[group_col].dtype, pd.CategoricalDtype):
+        keys = keys.assign(**{group_col: keys[group_col].cat.codes})
+    return pd.MultiIndex.from_frame(keys).is_monotonic_increasing
+
+@timed()
+def create_features(df, group_col=None, freq='MS', copy=True):
     """
     Create time-based features for forecasting.
     Input: DataFrame with 'date' and 'energy_consumption_kwh'.
     Output: DataFrame with new features.
+
+    With group_col set (e.g. 'site_id'), the frame is sorted by group and date
+    and lag/rolling features are computed within each group, so many series
+    can be featurized in one call.
+
+    freq selects the calendar, lag and rolling features (see FREQUENCY_SPECS).
+    With copy=False the columns are added to df in place; a grouped frame that
+    is not already sorted by group and date is still reordered into a new frame.
     """
-    df = df.copy()
-    
+    spec = _spec(freq)
+    if copy:
+        df = df.copy()
+
     # Ensure date is datetime
-    df['date'] = pd.to_datetime(df['date'])
-    
+    if not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'])
+
+    if group_col is not None and not _is_sorted(df, group_col):
+        df = df.sort_values([group_col, 'date'], kind='stable', ignore_index=True)
+
     # Time features
-    df['month'] = df['date'].dt.month
-    df['year'] = df['date'].dt.year
-    
-    # Lag features (Energy use from 1 month ago)
-    df['lag_1m'] = df['energy_consumption_kwh'].shift(1)
-    
-    # Rolling mean (3-month moving average)
-    df['rolling_mean_3m'] = df['energy_consumption_kwh'].rolling(window=3).mean()
-    
-    # Drop rows with NaN created by lag/rolling (first few rows)
-    # For training we need clean data.
-    # However, for the very latest data point we might not want to drop if we are predicting.
-    # But this function is likely used before training.
-    
+    dates = df['date'].dt
+    for name in spec['calendar']:
+        df[name] = getattr(dates, name)
+
+    # Lag features and rolling means, within each series when grouped
+    if group_col is not None:
+        energy = df.groupby(group_col, observed=True, sort=False)[TARGET]
+        for name, lag in spec['lags'].items():
+            df[name] = energy.shift(lag)
+        for name, window in spec['rolling'].items():
+            df[name] = energy.rolling(window=window).mean().reset_index(level=0, drop=True)
+        return df
+
+    for name, lag in spec['lags'].items():
+        df[name] = df[TARGET].shift(lag)
+    for name, window in spec['rolling'].items():
+        df[name] = df[TARGET].rolling(window=window).mean()
+
+    # Rows at the start of the history have NaN lag/rolling values;
+    # callers drop them before training.
     return df
+
+def history_tail(df, freq='MS', group_col=None):
+    """
+    The most recent rows (per group) that update_features needs as context.
+    """
+    window = history_window(freq)
+    if group_col is None:
+        return df[['date', TARGET]].tail(window)
+    return df.groupby(group_col, observed=True, sort=False)[[group_col, 'date', TARGET]].tail(window)
+
+@timed()
+def update_features(tail, new_rows, freq='MS', group_col=None):
+    """
+    Streaming counterpart of create_features.
+
+    Computes features for new_rows using only `tail` (from history_tail or a
+    previous call) as context, so the cost depends on the size of the new batch
+    rather than the full history, and the history frame is never copied.
+
+    Returns (new_features, next_tail).
+    """
+    cols = ['date', TARGET] if group_col is None else [group_col, 'date', TARGET]
+    window = pd.concat([tail[cols], new_rows[cols]], ignore_index=True)
+    window['_new'] = [False] * len(tail) + [True] * len(new_rows)
+
+    window = create_features(window, group_col=group_col, freq=freq, copy=False)
+    new_features = window.loc[window['_new']].drop(columns='_new').reset_index(drop=True)
+
+    next_tail = history_tail(window, freq=freq, group_col=group_col)
+    return new_features, next_tail.reset_index(drop=True)
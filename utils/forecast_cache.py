@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from . import forecasting, model_store
+from .instrumentation import span
+from .serving import SingleFlight
+
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(model_store.MODELS_DIR, 'forecasts')
+
+
+def fingerprint(df, params=None, features=None, options=None):
+    """
+    Content hash of the input frame plus the model configuration.
+    Two frames with identical values (and index) produce the same key.
+    options holds call arguments that change the result (e.g. horizon);
+    params default to those of options['backend'].
+    """
+    if params is None:
+        backend = (options or {}).get('backend') or forecasting.DEFAULT_BACKEND
+        params = forecasting.check_backend(backend)['params']
+    features = forecasting.FEATURES if features is None else features
+
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(json.dumps(list(df.columns), default=str).encode())
+    h.update(json.dumps({
+        'version': CACHE_VERSION,
+        'params': params,
+        'features': list(features),
+        'options': options or {},
+    }, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class ForecastCache:
+    """
+    Two-tier cache for (forecast_df, mae) results.
+    Tier 1 is an in-process LRU, tier 2 is a directory of versioned joblib artifacts.
+    Concurrent misses on the same key (e.g. several sessions opening the
+    dashboard at once) train a single model and share the result.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}-{key}.pkl")
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        if os.path.exists(path):
+            import joblib
+            try:
+                value = joblib.load(path)
+            except Exception:
+                # Truncated or stale artifact: treat as a miss and overwrite later.
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                self._remember(key, value)
+                return value
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        # Unique per writer: sessions of one server share a pid.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        os.close(fd)
+        import joblib
+        try:
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_compute(self, df, compute=None, **kwargs):
+        with span('forecast_cache.lookup') as attrs:
+            if compute is None and kwargs.get('backend') is None:
+                # Resolved here so deployments with different defaults get different keys.
+                kwargs['backend'] = forecasting.DEFAULT_BACKEND
+            key = fingerprint(df, options=kwargs)
+            hits = self.stats['memory_hits']
+            value = self.get(key)
+            if value is None:
+                compute = forecasting.train_and_forecast if compute is None else compute
+                attrs['cache'] = 'shared'
+
+                def load():
+                    # A flight that finished after the lookup above already stored it.
+                    value = self._memory.get(key)
+                    if value is None:
+                        attrs['cache'] = 'miss'
+                        value = compute(df, **kwargs)
+                        self.put(key, value)
+                    return value
+
+                value = self._flight.do(key, load)
+            else:
+                attrs['cache'] = 'memory' if self.stats['memory_hits'] > hits else 'disk'
+        return value
+
+    def hit_rate(self):
+        with self._lock:
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def clear(self, disk=False):
+        self._memory.clear()
+        if disk and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+_default_cache = ForecastCache()
+
+
+def cached_train_and_forecast(df, **kwargs):
+    """
+    Drop-in replacement for train_and_forecast that skips retraining
+    when the same data and configuration were already seen.
+    """
+    return _default_cache.get_or_compute(df, **kwargs)
+
+
+def cache_stats():
+    stats = dict(_default_cache.stats)
+    stats['hit_rate'] = _default_cache.hit_rate()
+    return stats
@@ -1,99 +1,767 @@
+import os
+import warnings
+
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error
-from sklearn.model_selection import train_test_split
-import joblib
-import os
-from .feature_engineering import create_features
+from . import model_store
+from .feature_engineering import create_features, history_tail, update_features
+from .instrumentation import span, timed
+
+# sklearn and joblib are imported inside the functions that fit, score or
+# persist models, so importing this module (e.g. for FEATURES) stays cheap.
+
+MODEL_NAME = 'forecast_model'  # name of the portfolio model in utils.model_store
+
+FEATURES = ['month', 'year', 'lag_1m', 'rolling_mean_3m']
+TARGET = 'energy_consumption_kwh'
+MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+MAX_HORIZON = 36
+
+# Incremental updates: refit from scratch once the smoothed MAE on new months
+# degrades by more than DRIFT_THRESHOLD, or the forest grows past MAX_TREES.
+DRIFT_THRESHOLD = 0.25
+DRIFT_SMOOTHING = 0.3
+MAX_TREES = 300
+
+# Forecasting backends, selectable per call (backend=) or per deployment
+# (ENERGY_AI_FORECAST_BACKEND). 'features' backends are regressors on FEATURES,
+# rolled forward with recursive_forecast; 'series' backends model the monthly
+# values directly and forecast every series in one vectorized pass.
+# 'trailing_mean' backends train on the rolling mean of the three months before
+# each target (trailing_rolling_mean), the value they are fed at predict time;
+# random_forest keeps the create_features mean its stored models and
+# update_model were built on.
+BACKENDS = {
+    'random_forest': {'kind': 'features', 'params': MODEL_PARAMS},
+    'hist_gradient_boosting': {'kind': 'features', 'trailing_mean': True,
+                               'params': {'max_iter': 100, 'min_samples_leaf': 5, 'random_state': 42}},
+    'ridge': {'kind': 'features', 'trailing_mean': True, 'params': {'alpha': 1.0}},
+    'seasonal_naive': {'kind': 'series', 'params': {'season': 12}},
+    'holt_winters': {'kind': 'series', 'params': {'season': 12, 'damping': 0.98}},
+}
+DEFAULT_BACKEND = os.environ.get('ENERGY_AI_FORECAST_BACKEND', 'random_forest')
+
+def _check_horizon(horizon):
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON}, got {horizon}")
+
+def calendar(last_dates, steps, start=1):
+    """
+    Month and year of the next `steps` months after each date, as (n_series, steps) arrays.
+    start=1 - steps gives the `steps` months ending at each date instead.
+    """
+    last_dates = pd.DatetimeIndex(last_dates)
+    months_since_zero = (last_dates.year.to_numpy() * 12 + last_dates.month.to_numpy() - 1)[:, None]
+    target = months_since_zero + np.arange(start, start + steps)
+    return target % 12 + 1, target // 12
+
+def _future_dates(last_dates, horizon):
+    last_dates = pd.DatetimeIndex(last_dates)
+    return [last_dates + pd.DateOffset(months=h) for h in range(1, horizon + 1)]
+
+def _history_window(values, window=3):
+    """
+    Right-align the last `window` values of a 1-D series, left-padding short series with NaN.
+    """
+    out = np.full((1, window), np.nan)
+    tail = np.asarray(values, dtype=float)[-window:]
+    if len(tail):
+        out[0, window - len(tail):] = tail
+    return out
+
+def recursive_forecast(model, history, last_dates, horizon=3, series_codes=None):
+    """
+    Roll a one-step model forward `horizon` months for many series at once.
+
+    history: (n_series, 3) array of the most recent observations, oldest first.
+    last_dates: date of the last observation for each series.
+    series_codes: optional (n_series,) identifier appended as the last feature.
+
+    Works on preallocated arrays and issues a single predict per step
+    covering every series. Returns an (n_series, horizon) array.
+    """
+    _check_horizon(horizon)
+    n_series, window = history.shape
+    months, years = calendar(last_dates, horizon)
+
+    values = np.empty((n_series, window + horizon))
+    values[:, :window] = history
+
+    n_features = len(FEATURES) + (series_codes is not None)
+    X = np.empty((n_series, n_features))
+    if series_codes is not None:
+        X[:, -1] = series_codes
+
+    for h in range(horizon):
+        X[:, 0] = months[:, h]
+        X[:, 1] = years[:, h]
+        X[:, 2] = values[:, window + h - 1]
+        X[:, 3] = np.nanmean(values[:, h + window - 3:h + window], axis=1)
+        values[:, window + h] = model.predict(X)
+
+    return values[:, window:]
+
+def trailing_rolling_mean(df_features, group_col=None):
+    """
+    rolling_mean_3m of create_features shifted by one month (within each series
+    when group_col is set). create_features includes a row's own month in its
+    mean; shifted, it covers the three months before the target, as
+    recursive_forecast computes it at predict time.
+    """
+    rolling = df_features['rolling_mean_3m'] if group_col is None else (
+        df_features.groupby(group_col, observed=True, sort=False)['rolling_mean_3m']
+    )
+    return rolling.shift(1)
+
+def _direct_targets(df_clean, horizon, group_col=None):
+    """
+    (n_rows, horizon) matrix whose column h holds the target h months after each row.
+    """
+    target = df_clean[TARGET] if group_col is None else (
+        df_clean.groupby(group_col, observed=True, sort=False)[TARGET]
+    )
+    return np.column_stack([target.shift(-h).to_numpy() for h in range(horizon)])
+
+def _next_step_features(history, last_dates, series_codes=None):
+    months, years = calendar(last_dates, 1)
+    cols = [months[:, 0], years[:, 0], history[:, -1], np.nanmean(history, axis=1)]
+    if series_codes is not None:
+        cols.append(series_codes)
+    return np.column_stack(cols)
+
+def _forecast_frame(pred, last_dates, keys=None, series_col=None):
+    """
+    Long frame of (series, date, forecast) from an (n_series, horizon) prediction array.
+    """
+    n_series, horizon = pred.shape
+    dates = _future_dates(last_dates, horizon)
+    frame = pd.DataFrame({
+        'date': np.column_stack([d.values for d in dates]).ravel(),
+        TARGET: pred.ravel(),
+        'forecast': True,
+    })
+    if series_col is not None:
+        frame.insert(0, series_col, np.repeat(np.asarray(keys), horizon))
+    return frame
+
+def check_backend(backend):
+    """
+    Spec of a backend in BACKENDS ({'kind', 'params', ...}); ValueError for unknown names.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown forecasting backend: {backend}. Expected one of {list(BACKENDS)}")
+    return BACKENDS[backend]
+
+class RidgeRegressor:
+    """
+    Closed-form ridge regression: (Z'Z + alpha I)^-1 Z'y on standardized
+    FEATURES with an unpenalized intercept. The month column enters as sin/cos
+    so a linear model can follow the seasonal cycle. y may have one column
+    per horizon step (strategy='direct').
+
+    With grouped=True the last column of X is a series code (pooled mode).
+    Each series gets its own unpenalized intercept, fitted by centering rows
+    within their series, instead of a slope on an arbitrary label.
+    """
+
+    def __init__(self, alpha=1.0, grouped=False):
+        self.alpha = alpha
+        self.grouped = grouped
+
+    def _design(self, X):
+        X = np.asarray(X, dtype=float)
+        if self.grouped:
+            X = X[:, :-1]
+        angle = 2 * np.pi * X[:, :1] / 12
+        return np.hstack([np.sin(angle), np.cos(angle), X[:, 1:]])
+
+    @staticmethod
+    def _group_means(values, codes, n_groups):
+        sums = np.zeros((n_groups,) + values.shape[1:])
+        np.add.at(sums, codes, values)
+        counts = np.bincount(codes, minlength=n_groups).reshape((-1,) + (1,) * (values.ndim - 1))
+        return sums / np.maximum(counts, 1)
+
+    def fit(self, X, y):
+        Z = self._design(X)
+        y = np.asarray(y, dtype=float)
+        if self.grouped:
+            codes = np.asarray(X)[:, -1].astype(np.int64)
+            n_groups = int(codes.max()) + 1
+            z_mean = self._group_means(Z, codes, n_groups)
+            y_mean = self._group_means(y, codes, n_groups)
+            Zc, yc = Z - z_mean[codes], y - y_mean[codes]
+        else:
+            z_mean, y_mean = Z.mean(axis=0), y.mean(axis=0)
+            Zc, yc = Z - z_mean, y - y_mean
+
+        scale = Zc.std(axis=0)
+        scale[scale == 0] = 1.0
+        Zs = Zc / scale
+        gram = Zs.T @ Zs + self.alpha * np.eye(Zs.shape[1])
+        self.coef_ = np.linalg.solve(gram, Zs.T @ yc) / (scale if y.ndim == 1 else scale[:, None])
+        self.intercept_ = y_mean - z_mean @ self.coef_
+        return self
+
+    def predict(self, X):
+        pred = self._design(X) @ self.coef_
+        if self.grouped:
+            return pred + self.intercept_[np.asarray(X)[:, -1].astype(np.int64)]
+        return pred + self.intercept_
+
+def _make_regressor(backend, multi_output=False, **overrides):
+    """
+    Unfitted regressor (sklearn fit/predict contract) of a 'features' backend.
+    """
+    spec = check_backend(backend)
+    if spec['kind'] != 'features':
+        raise ValueError(f"{backend} models the series directly and has no feature regressor")
+    params = {**spec['params'], **overrides}
+    if backend == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**params)
+    if backend == 'ridge':
+        return RidgeRegressor(**params)
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    model = HistGradientBoostingRegressor(**params)
+    if multi_output:
+        from sklearn.multioutput import MultiOutputRegressor
+        model = MultiOutputRegressor(model)
+    return model
+
+def _matrix_features(values, last_dates):
+    """
+    FEATURES and targets of every complete row of a (n_series, T) value matrix,
+    matching create_features + trailing_rolling_mean + dropna on each series:
+    no feature of a row includes its target month.
+    """
+    months, years = calendar(last_dates, values.shape[1], start=1 - values.shape[1])
+    X = np.stack([
+        months[:, 3:],
+        years[:, 3:],
+        values[:, 2:-1],
+        (values[:, :-3] + values[:, 1:-2] + values[:, 2:-1]) / 3,
+    ], axis=-1).reshape(-1, len(FEATURES))
+    y = values[:, 3:].ravel()
+    complete = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+    return X[complete], y[complete]
+
+# Series-level forecasters share one interface, used by backtesting and the
+# 'series' paths of train_and_forecast(_batch):
+#     model = make_forecaster('holt_winters').fit(values, last_dates)
+#     pred = model.predict(horizon)          # (n_series, horizon)
+# values is a (n_series, T) matrix of monthly observations, oldest first and
+# right-aligned on each series' last date, with NaN before a series starts.
+
+class FeatureForecaster:
+    """
+    A 'features' backend regressor trained on all rows of the value matrix
+    and rolled forward with recursive_forecast.
+    """
+
+    def __init__(self, regressor):
+        self.regressor = regressor
+
+    def fit(self, values, last_dates):
+        values = np.asarray(values, dtype=float)
+        self.regressor.fit(*_matrix_features(values, last_dates))
+        self.history_ = values[:, -3:]
+        self.last_dates_ = pd.DatetimeIndex(last_dates)
+        return self
+
+    def predict(self, horizon):
+        return recursive_forecast(self.regressor, self.history_, self.last_dates_, horizon)
+
+class SeasonalNaive:
+    """
+    Repeats each series' last observed season; series shorter than one
+    season repeat their last value for the missing months.
+    """
+
+    def __init__(self, season=12):
+        self.season = season
+
+    def fit(self, values, last_dates):
+        values = np.asarray(values, dtype=float)
+        last = values[:, -self.season:]
+        self.last_season_ = np.where(np.isnan(last), values[:, -1:], last)
+        return self
+
+    def predict(self, horizon):
+        _check_horizon(horizon)
+        return self.last_season_[:, np.arange(horizon) % self.season]
+
+    def one_step(self, values):
+        """
+        One-step-ahead predictions for every month of values (NaN for the first).
+        """
+        values = np.asarray(values, dtype=float)
+        pred = np.full(values.shape, np.nan)
+        pred[:, self.season:] = values[:, :-self.season]
+        naive = np.full(values.shape, np.nan)
+        naive[:, 1:] = values[:, :-1]
+        return np.where(np.isnan(pred), naive, pred)
+
+def _holt_winters(values, alpha, beta, gamma, season, damping, keep_predictions=False):
+    """
+    Additive Holt-Winters with a damped trend over a (n_series, T) matrix, for
+    smoothing parameters broadcastable to (n_series, n_params). Each series is
+    initialized from its first two seasons; NaN months are skipped (the state
+    is carried forward). Every series and parameter set advances in one array
+    operation per month.
+
+    Returns (sse, level, trend, seasonal, phase, predictions): one-step squared
+    error and final states per (series, params), the seasonal slot of the next
+    month per series, and one-step predictions if keep_predictions (n_params = 1).
+    """
+    n_series, T = values.shape
+    n_params = np.broadcast_shapes(np.shape(alpha), np.shape(beta), np.shape(gamma))[-1]
+    rows = np.arange(n_series)
+    observed = ~np.isnan(values)
+    start = np.where(observed.any(axis=1), observed.argmax(axis=1), T)
+
+    idx = start[:, None] + np.arange(2 * season)
+    first = np.where(idx < T, values[rows[:, None], np.minimum(idx, T - 1)], np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # series shorter than two seasons
+        level0 = np.nanmean(first[:, :season], axis=1)
+        trend0 = (np.nanmean(first[:, season:], axis=1) - level0) / season
+    level = np.repeat(np.nan_to_num(level0)[:, None], n_params, axis=1)
+    trend = np.repeat(np.nan_to_num(trend0)[:, None], n_params, axis=1)
+    seasonal = np.repeat(np.nan_to_num(first[:, :season] - level0[:, None])[:, None, :], n_params, axis=1)
+
+    sse = np.zeros((n_series, n_params))
+    predictions = np.full((n_series, T), np.nan) if keep_predictions else None
+    for t in range(int(start.min()) + season, T):
+        started = (t >= start + season)[:, None]
+        active = started & observed[:, t:t + 1]
+        phase = (t - start) % season
+        s = seasonal[rows, :, phase]
+        pred = level + damping * trend + s
+        err = np.where(active, np.nan_to_num(values[:, t:t + 1]) - pred, 0.0)
+        sse += err ** 2
+        if keep_predictions:
+            predictions[:, t] = np.where(started[:, 0], pred[:, 0], np.nan)
+        level = np.where(started, level + damping * trend + alpha * err, level)
+        trend = np.where(started, damping * trend + alpha * beta * err, trend)
+        seasonal[rows, :, phase] = s + gamma * (1 - alpha) * err
+
+    return sse, level, trend, seasonal, (T - start) % season, predictions
+
+class HoltWinters:
+    """
+    Additive Holt-Winters with a damped trend, vectorized across series.
+    Smoothing parameters are chosen per series from GRID by one-step squared
+    error; every candidate is evaluated for every series in the same pass.
+    """
+    GRID = np.array([(a, b, g) for a in (0.1, 0.3, 0.5, 0.8)
+                     for b in (0.0, 0.05, 0.2) for g in (0.05, 0.2, 0.5)]).T
+
+    def __init__(self, season=12, damping=0.98):
+        self.season = season
+        self.damping = damping
+
+    def fit(self, values, last_dates):
+        values = np.asarray(values, dtype=float)
+        sse, level, trend, seasonal, phase, _ = _holt_winters(
+            values, *self.GRID[:, None, :], self.season, self.damping)
+        rows = np.arange(len(values))
+        best = sse.argmin(axis=1)
+        self.params_ = self.GRID[:, best].T
+        self.level_, self.trend_ = level[rows, best], trend[rows, best]
+        self.seasonal_, self.phase_ = seasonal[rows, best], phase
+        return self
+
+    def predict(self, horizon):
+        _check_horizon(horizon)
+        steps = np.arange(1, horizon + 1)
+        damped = np.cumsum(self.damping ** steps)
+        slots = (self.phase_[:, None] + steps - 1) % self.season
+        return (self.level_[:, None] + self.trend_[:, None] * damped
+                + np.take_along_axis(self.seasonal_, slots, axis=1))
 
-MODEL_PATH = 'models/forecast_model.pkl'
+    def one_step(self, values):
+        """
+        One-step-ahead predictions with the fitted parameters; months before
+        the first full season fall back to the previous value.
+        """
+        values = np.asarray(values, dtype=float)
+        alpha, beta, gamma = (p[:, None] for p in self.params_.T)
+        *_, pred = _holt_winters(values, alpha, beta, gamma, self.season, self.damping,
+                                 keep_predictions=True)
+        naive = np.full(values.shape, np.nan)
+        naive[:, 1:] = values[:, :-1]
+        return np.where(np.isnan(pred), naive, pred)
 
-def train_and_forecast(df):
+def make_forecaster(backend=None, **overrides):
     """
-    Train a Random Forest model and forecast the next 3 months.
+    Unfitted series-level forecaster for a backend name (default DEFAULT_BACKEND).
+    overrides replace entries of the backend's params.
     """
-    # Create models directory if not exists
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    
+    backend = DEFAULT_BACKEND if backend is None else backend
+    spec = check_backend(backend)
+    if spec['kind'] == 'features':
+        return FeatureForecaster(_make_regressor(backend, **overrides))
+    params = {**spec['params'], **overrides}
+    return SeasonalNaive(**params) if backend == 'seasonal_naive' else HoltWinters(**params)
+
+def _fit_series_backend(backend, values, last_dates, test_size=0.2):
+    """
+    Fit a 'series' backend with the last test_size share of each series held
+    out, score its one-step predictions on those months, then refit on all.
+    Returns (model, residuals) with residuals NaN outside the holdout.
+    """
+    observed = ~np.isnan(values)
+    lengths = observed.sum(axis=1)
+    position = np.cumsum(observed, axis=1) - 1
+    test = observed & (position >= np.ceil(lengths * (1 - test_size))[:, None])
+
+    model = make_forecaster(backend)
+    with span('forecasting.fit_holdout', rows=int((observed & ~test).sum())):
+        model.fit(np.where(test, np.nan, values), last_dates)
+    residuals = np.where(test, values - model.one_step(values), np.nan)
+
+    with span('forecasting.fit_full', rows=int(observed.sum())):
+        model.fit(values, last_dates)
+    return model, residuals
+
+def _train_and_forecast_series(df, save, horizon, strategy, interval, backend):
+    if strategy not in ('recursive', 'direct'):
+        raise ValueError(f"Unknown forecasting strategy: {strategy}")
+    values = df[TARGET].to_numpy(dtype=float)[None, :]
+    # Same minimum as the feature backends: 10 rows once the rolling window is full.
+    if values.shape[1] < 12:
+        return None, 0.0
+
+    last_dates = pd.DatetimeIndex(pd.to_datetime(df['date']).iloc[-1:])
+    model, residuals = _fit_series_backend(backend, values, last_dates)
+    residuals = residuals[~np.isnan(residuals)]
+    mae = float(np.mean(np.abs(residuals)))
+
+    if save:
+        model_store.save_model(model, MODEL_NAME, meta={'baseline_mae': mae, 'strategy': strategy,
+                                                        'horizon': horizon, 'backend': backend})
+
+    pred = model.predict(horizon)
+    forecast = _forecast_frame(pred, last_dates)
+    if interval is not None:
+        from .simulation import residual_interval
+
+        forecast['lower'], forecast['upper'] = residual_interval(pred[0], residuals, interval)
+    return forecast, mae
+
+@timed()
+def train_and_forecast(df, save=True, horizon=3, strategy='recursive', interval=None,
+                       backend=None):
+    """
+    Train a forecasting backend (see BACKENDS; default DEFAULT_BACKEND, a
+    Random Forest) and forecast the next `horizon` months (1-36).
+    Set save=False to skip storing the fitted model as MODEL_NAME in the model store.
+
+    strategy='recursive' feeds each one-step prediction back in as the next lag.
+    strategy='direct' fits a multi-output model that predicts the whole horizon
+    in one call; its MAE is averaged over all horizon steps. 'series' backends
+    forecast the whole horizon from their fitted state either way.
+
+    interval (e.g. 0.9) adds 'lower'/'upper' columns: the central prediction
+    interval of the per-tree forecasts for the forest (see utils.simulation),
+    of the holdout residuals for the other backends.
+    """
+    _check_horizon(horizon)
+    backend = DEFAULT_BACKEND if backend is None else backend
+    spec = check_backend(backend)
+    if spec['kind'] == 'series':
+        return _train_and_forecast_series(df, save, horizon, strategy, interval, backend)
+
     # 1. Feature Engineering
     df_features = create_features(df)
-    
+    if spec.get('trailing_mean'):
+        df_features['rolling_mean_3m'] = trailing_rolling_mean(df_features)
+
     # Drop rows with NaN (from lag/rolling)
     df_clean = df_features.dropna()
-    
-    # Define features and target
-    features = ['month', 'year', 'lag_1m', 'rolling_mean_3m']
-    target = 'energy_consumption_kwh'
-    
-    X = df_clean[features]
-    y = df_clean[target]
-    
+
+    X = df_clean[FEATURES].to_numpy()
+    y = df_clean[TARGET].to_numpy()
+
+    if strategy == 'direct':
+        y = _direct_targets(df_clean, horizon)
+        complete = ~np.isnan(y).any(axis=1)
+        X, y = X[complete], y[complete]
+    elif strategy != 'recursive':
+        raise ValueError(f"Unknown forecasting strategy: {strategy}")
+
     # Robust check for enough data
     if len(X) < 10:
         return None, 0.0
-    
-    # Split for validation (last 3 months as test set for MAE calculation)
-    # But for final forecasting, we should retrain on all data?
-    # User requirement: "Calculate MAE" and "Predict next 3 months".
-    # Typically: Train/Test split -> Calculate MAE -> Retrain on all -> Forecast.
-    
+
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import train_test_split
+
+    # Split for validation (last 20% of months as test set for MAE calculation),
+    # then retrain on all data before forecasting.
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-    
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    
+
+    model = _make_regressor(backend, multi_output=strategy == 'direct')
+    with span('forecasting.fit_holdout', rows=len(X_train)):
+        model.fit(X_train, y_train)
+
     predictions = model.predict(X_test)
     mae = mean_absolute_error(y_test, predictions)
-    
+
     # Retrain on full dataset for future forecasting
-    model.fit(X, y)
-    
+    with span('forecasting.fit_full', rows=len(X)):
+        model.fit(X, y)
+
     # Save model
-    joblib.dump(model, MODEL_PATH)
-    
-    # Forecast next 3 months
-    future_forecast = []
-    last_row = df_features.iloc[-1].copy()
-    
-    current_date = last_row['date']
-    
-    # Iterative forecasting
-    # We need to update lag and rolling mean for each step
-    # This involves appending the predicted value to history to calculate next features
-    
-    history_energy = list(df['energy_consumption_kwh'].values)
-    
-    for i in range(3):
-        next_date = current_date + pd.DateOffset(months=1)
-        
-        # Calculate features for next date
-        lag_1m = history_energy[-1]
-        rolling_mean_3m = np.mean(history_energy[-3:])
-        
-        features_dict = {
-            'month': [next_date.month],
-            'year': [next_date.year],
-            'lag_1m': [lag_1m],
-            'rolling_mean_3m': [rolling_mean_3m]
-        }
-        
-        X_future = pd.DataFrame(features_dict)
-        pred_energy = model.predict(X_future)[0]
-        
-        future_forecast.append({
-            'date': next_date,
-            'energy_consumption_kwh': pred_energy,
-            'forecast': True
-        })
-        
-        # Update history
-        history_energy.append(pred_energy)
-        current_date = next_date
-        
-    return pd.DataFrame(future_forecast), mae
-
-def load_model():
-    if os.path.exists(MODEL_PATH):
-        return joblib.load(MODEL_PATH)
-    return None
+    if save:
+        model_store.save_model(model, MODEL_NAME,
+                               meta={'baseline_mae': mae, 'strategy': strategy, 'horizon': horizon,
+                                     'backend': backend})
+
+    history = _history_window(df[TARGET].to_numpy())
+    last_dates = df_features['date'].iloc[-1:]
+
+    if strategy == 'direct':
+        pred = model.predict(_next_step_features(history, last_dates)).reshape(1, -1)
+    else:
+        pred = recursive_forecast(model, history, last_dates, horizon)
+
+    forecast = _forecast_frame(pred, last_dates)
+    if interval is not None and backend != 'random_forest':
+        from .simulation import residual_interval
+
+        forecast['lower'], forecast['upper'] = residual_interval(pred[0], y_test - predictions, interval)
+    elif interval is not None:
+        from .simulation import direct_tree_predictions, tree_paths
+
+        if strategy == 'direct':
+            paths = direct_tree_predictions(model, _next_step_features(history, last_dates))
+        else:
+            paths = tree_paths(model, history, last_dates, horizon)
+        tail = (1 - interval) / 2
+        lower, upper = np.quantile(paths[:, 0, :], [tail, 1 - tail], axis=0)
+        forecast['lower'] = lower
+        forecast['upper'] = upper
+
+    return forecast, mae
+
+def series_frame(df, series_col):
+    """
+    One row per (series, date) with the target summed over meters.
+    """
+    return (
+        df.groupby([series_col, 'date'], observed=True, sort=True)[TARGET]
+        .sum()
+        .reset_index()
+    )
+
+def _holdout_mask(df_clean, series_col, test_size=0.2):
+    """
+    Chronological split applied within each series: the last test_size share of rows is held out.
+    """
+    groups = df_clean.groupby(series_col, observed=True, sort=False)
+    position = groups.cumcount().to_numpy()
+    length = groups[TARGET].transform('size').to_numpy()
+    return position >= np.ceil(length * (1 - test_size))
+
+def history_matrix(series_df, series_col, window=3):
+    """
+    (n_series, window) array of each series' last observations plus their keys and last dates.
+    Expects series_df sorted by series then date.
+    """
+    groups = series_df.groupby(series_col, observed=True, sort=False)
+    from_end = groups.cumcount(ascending=False).to_numpy()
+    codes = groups.ngroup().to_numpy()
+
+    last = series_df.loc[from_end == 0]
+    history = np.full((len(last), window), np.nan)
+    recent = from_end < window
+    history[codes[recent], window - 1 - from_end[recent]] = series_df.loc[recent, TARGET].to_numpy()
+    return history, last[series_col].to_numpy(), pd.DatetimeIndex(last['date'])
+
+def _forecast_pooled(series_df, series_col, horizon=3, strategy='recursive', backend='random_forest'):
+    df_features = create_features(series_df, group_col=series_col)
+    if check_backend(backend).get('trailing_mean'):
+        df_features['rolling_mean_3m'] = trailing_rolling_mean(df_features, series_col)
+    df_features['series_code'] = df_features[series_col].astype('category').cat.codes
+    features = FEATURES + ['series_code']
+
+    df_clean = df_features.dropna(subset=features)
+    y = df_clean[TARGET].to_numpy()
+
+    if strategy == 'direct':
+        y = _direct_targets(df_clean, horizon, group_col=series_col)
+        complete = ~np.isnan(y).any(axis=1)
+        df_clean, y = df_clean[complete], y[complete]
+    elif strategy != 'recursive':
+        raise ValueError(f"Unknown forecasting strategy: {strategy}")
+
+    # Hold out the last rows that still have a full target, as train_and_forecast does.
+    X = df_clean[features].to_numpy()
+    test = _holdout_mask(df_clean, series_col)
+    test_keys = df_clean[series_col].to_numpy()
+
+    # The forest parallelizes its fit; ridge fits one intercept per series
+    # rather than a slope on the arbitrary series code.
+    overrides = {'random_forest': {'n_jobs': -1}, 'ridge': {'grouped': True}}.get(backend, {})
+    model = _make_regressor(backend, multi_output=strategy == 'direct', **overrides)
+    model.fit(X[~test], y[~test])
+
+    abs_err = np.abs(model.predict(X[test]) - y[test])
+    if abs_err.ndim > 1:
+        abs_err = abs_err.mean(axis=1)
+    mae = pd.Series(abs_err, index=test_keys[test]).groupby(level=0).mean()
+
+    model.fit(X, y)
+
+    history, keys, last_dates = history_matrix(df_features, series_col)
+    codes = df_features.groupby(series_col, observed=True, sort=False)['series_code'].first().to_numpy()
+
+    if strategy == 'direct':
+        pred = model.predict(_next_step_features(history, last_dates, codes)).reshape(len(keys), -1)
+    else:
+        pred = recursive_forecast(model, history, last_dates, horizon, series_codes=codes)
+
+    return _forecast_frame(pred, last_dates, keys, series_col), mae.reindex(keys)
+
+def _forecast_one(series_col, key, frame, horizon, strategy, backend):
+    forecast, mae = train_and_forecast(frame[['date', TARGET]], save=False,
+                                       horizon=horizon, strategy=strategy, backend=backend)
+    if forecast is None:
+        return None, key, mae
+    forecast.insert(0, series_col, key)
+    return forecast, key, mae
+
+def _forecast_per_series(series_df, series_col, n_jobs, horizon=3, strategy='recursive',
+                         backend='random_forest'):
+    import joblib
+
+    groups = series_df.groupby(series_col, observed=True, sort=False)
+    results = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(_forecast_one)(series_col, key, frame, horizon, strategy, backend)
+        for key, frame in groups
+    )
+    frames = [f for f, _, _ in results if f is not None]
+    mae = pd.Series({key: m for f, key, m in results if f is not None}, dtype=float)
+    forecast = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return forecast, mae
+
+def _forecast_series_backend(series_df, series_col, horizon=3, strategy='recursive',
+                             backend='holt_winters'):
+    if strategy not in ('recursive', 'direct'):
+        raise ValueError(f"Unknown forecasting strategy: {strategy}")
+    lengths = series_df.groupby(series_col, observed=True, sort=False).size()
+    values, keys, last_dates = history_matrix(series_df, series_col, window=int(lengths.max()))
+    # Same minimum as train_and_forecast: shorter series get no forecast.
+    enough = lengths.to_numpy() >= 12
+    values, keys, last_dates = values[enough], keys[enough], last_dates[enough]
+
+    model, residuals = _fit_series_backend(backend, values, last_dates)
+    mae = pd.Series(np.nanmean(np.abs(residuals), axis=1), index=keys)
+    return _forecast_frame(model.predict(horizon), last_dates, keys, series_col), mae
+
+@timed()
+def train_and_forecast_batch(df, series_col='site_id', mode='pooled', n_jobs=-1,
+                             horizon=3, strategy='recursive', backend=None):
+    """
+    Forecast the next `horizon` months for every series in a long-format frame.
+
+    mode='pooled' trains one model on all series with a series identifier feature.
+    mode='per_series' fits one model per series across a joblib process pool.
+    strategy and backend are passed through as in train_and_forecast. 'series'
+    backends fit every series separately in one vectorized pass, in either mode.
+
+    Returns (forecast_df, mae) where forecast_df has one row per series and
+    forecast month and mae is a Series of holdout MAE indexed by series.
+    """
+    _check_horizon(horizon)
+    backend = DEFAULT_BACKEND if backend is None else backend
+    series_df = series_frame(df, series_col)
+    if mode not in ('pooled', 'per_series'):
+        raise ValueError(f"Unknown forecasting mode: {mode}")
+    if check_backend(backend)['kind'] == 'series':
+        return _forecast_series_backend(series_df, series_col, horizon, strategy, backend)
+    if mode == 'pooled':
+        return _forecast_pooled(series_df, series_col, horizon, strategy, backend)
+    return _forecast_per_series(series_df, series_col, n_jobs, horizon, strategy, backend)
+
+def load_model(cache=True):
+    """
+    Latest stored portfolio model, or None.
+    Pass cache=False for a private copy that may be modified.
+    """
+    return model_store.load_model(MODEL_NAME, cache=cache)
+
+def load_model_meta():
+    return model_store.load_meta(MODEL_NAME)
+
+@timed()
+def update_model(history, new_rows, n_new_trees=20, context_rows=12,
+                 drift_threshold=DRIFT_THRESHOLD):
+    """
+    Fold newly arrived months into the stored model (MODEL_NAME) without a full refit.
+
+    Only the last `context_rows` months of history are featurized together with
+    new_rows (feature_engineering.update_features), so the cost scales with the
+    new data rather than the full history.
+    The persisted model is scored on the new months first and the error is folded
+    into an exponentially smoothed MAE. If that exceeds the baseline MAE from the
+    last full fit by more than drift_threshold (relative), the model is retrained
+    from scratch on history + new_rows instead.
+
+    Only Random Forest models are updated in place; other backends are refit
+    with the same backend.
+
+    Returns (model, info) where info describes which path was taken.
+    """
+    model = load_model(cache=False)
+    meta = load_model_meta()
+
+    # The last context_rows months are featurized again with the new ones (the
+    # added trees train on both); older history is only read through its tail.
+    split = max(len(history) - context_rows, 0)
+    recent = pd.concat([history.iloc[split:], new_rows], ignore_index=True)
+    df_window, _ = update_features(history_tail(history.iloc[:split]), recent)
+    df_window = df_window.dropna(subset=FEATURES)
+    new_features = df_window.tail(len(new_rows))
+    X_new = new_features[FEATURES].to_numpy()
+    y_new = new_features[TARGET].to_numpy()
+
+    info = {'refit': False, 'reason': None, 'mae_new': None, 'drift': None,
+            'baseline_mae': meta['baseline_mae'] if meta else None}
+
+    backend = meta.get('backend', 'random_forest') if meta else None
+    if model is None or meta is None or meta.get('strategy') != 'recursive' or backend != 'random_forest':
+        info['reason'] = 'no incremental model'
+    elif len(X_new) == 0:
+        info['reason'] = 'no new rows'
+        return model, info
+    else:
+        info['mae_new'] = float(np.mean(np.abs(model.predict(X_new) - y_new)))
+        baseline = meta['baseline_mae']
+        recent = meta.get('recent_mae', baseline)
+        meta['recent_mae'] = DRIFT_SMOOTHING * info['mae_new'] + (1 - DRIFT_SMOOTHING) * recent
+        # A zero baseline (a perfectly fit short or constant series) has no relative drift.
+        info['drift'] = (meta['recent_mae'] - baseline) / baseline if baseline > 0 else None
+        if baseline <= 0 or info['drift'] > drift_threshold:
+            info['reason'] = 'drift'
+        elif len(model.estimators_) + n_new_trees > MAX_TREES:
+            info['reason'] = 'max trees'
+
+    if info['reason'] is not None:
+        info['refit'] = True
+        full = pd.concat([history, new_rows], ignore_index=True)
+        train_and_forecast(full, backend=backend)
+        return load_model(), info
+
+    # Add trees fitted on the recent window; existing trees are kept as-is.
+    X_ctx = df_window[FEATURES].to_numpy()
+    y_ctx = df_window[TARGET].to_numpy()
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees)
+    model.fit(X_ctx, y_ctx)
+    model.set_params(warm_start=False)
+
+    model_store.save_model(model, MODEL_NAME, meta=meta)
+    info['n_estimators'] = len(model.estimators_)
+    return model, info
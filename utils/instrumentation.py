@@ -0,0 +1,195 @@
+"""
+Lightweight timing spans for the utils hot paths and the dashboard pages.
+
+    with span('forecast.fit', rows=len(X)):
+        model.fit(X, y)
+
+    @timed('features.create')
+    def create_features(...): ...
+
+Every finished span is
+- folded into process-wide latency histograms (prometheus_text / write_prometheus),
+- appended to the current session's sink, if one is attached (see attach),
+- logged as one JSON line on the 'energy_ai.spans' logger when it is enabled.
+
+Set ENERGY_AI_SPAN_LOG to a file path to write the JSON log there, and
+ENERGY_AI_PROMETHEUS_FILE to have write_prometheus() default to that path
+(e.g. a node_exporter textfile-collector directory).
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+LOGGER_NAME = 'energy_ai.spans'
+SPAN_LOG_ENV = 'ENERGY_AI_SPAN_LOG'
+PROMETHEUS_FILE_ENV = 'ENERGY_AI_PROMETHEUS_FILE'
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger(LOGGER_NAME)
+if os.environ.get(SPAN_LOG_ENV):
+    _handler = logging.FileHandler(os.environ[SPAN_LOG_ENV])
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_stack = contextvars.ContextVar('span_stack', default=())
+_sink = contextvars.ContextVar('span_sink', default=None)
+
+_lock = threading.Lock()
+_histograms = {}  # name -> {'buckets': [...], 'count': n, 'sum': s}
+_cache_counts = {}  # (name, result) -> n
+
+
+def attach(sink):
+    """
+    Route spans finished in the current thread/context to `sink` (anything with
+    .append, e.g. a bounded deque kept in session state). Pass None to detach.
+    """
+    _sink.set(sink)
+
+
+def current_span():
+    """
+    Attribute dict of the innermost open span (empty dict outside any span).
+    Attributes set on it are recorded when the span finishes.
+    """
+    stack = _stack.get()
+    return stack[-1]['attrs'] if stack else {}
+
+
+def record(name, seconds, parent=None, **attrs):
+    """
+    Record an already measured duration as a finished span.
+    """
+    entry = {'name': name, 'seconds': seconds, 'ts': time.time(), 'parent': parent}
+    entry.update(attrs)
+
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = {'buckets': [0] * len(BUCKETS), 'count': 0, 'sum': 0.0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist['buckets'][i] += 1
+                break
+        hist['count'] += 1
+        hist['sum'] += seconds
+        if 'cache' in attrs:
+            key = (name, attrs['cache'])
+            _cache_counts[key] = _cache_counts.get(key, 0) + 1
+
+    sink = _sink.get()
+    if sink is not None:
+        sink.append(entry)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(entry, default=str))
+    return entry
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time the enclosed block. Yields the span's attribute dict, which the block
+    may update (e.g. attrs['cache'] = 'hit'). Nested spans record their parent.
+    """
+    stack = _stack.get()
+    frame = {'name': name, 'attrs': attrs}
+    token = _stack.set(stack + (frame,))
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        elapsed = time.perf_counter() - t0
+        _stack.reset(token)
+        record(name, elapsed, parent=stack[-1]['name'] if stack else None, **attrs)
+
+
+def timed(name=None):
+    """
+    Decorator form of span; the span name defaults to module.function.
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """
+    Copy of the process-wide histograms and cache counters.
+    """
+    with _lock:
+        histograms = {name: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                      for name, h in _histograms.items()}
+        return histograms, dict(_cache_counts)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """
+    Process-wide metrics in the Prometheus text exposition format.
+    """
+    histograms, cache_counts = snapshot()
+    lines = [
+        '# HELP energy_ai_span_seconds Duration of instrumented code paths.',
+        '# TYPE energy_ai_span_seconds histogram',
+    ]
+    for name in sorted(histograms):
+        hist = histograms[name]
+        cumulative = 0
+        for bound, n in zip(BUCKETS, hist['buckets']):
+            cumulative += n
+            lines.append(f'energy_ai_span_seconds_bucket{{span="{_label(name)}",le="{bound}"}} {cumulative}')
+        lines.append(f'energy_ai_span_seconds_bucket{{span="{_label(name)}",le="+Inf"}} {hist["count"]}')
+        lines.append(f'energy_ai_span_seconds_sum{{span="{_label(name)}"}} {hist["sum"]:.6f}')
+        lines.append(f'energy_ai_span_seconds_count{{span="{_label(name)}"}} {hist["count"]}')
+
+    lines += [
+        '# HELP energy_ai_cache_lookups_total Cache lookups by result.',
+        '# TYPE energy_ai_cache_lookups_total counter',
+    ]
+    for (name, result), n in sorted(cache_counts.items()):
+        lines.append(f'energy_ai_cache_lookups_total{{span="{_label(name)}",result="{_label(result)}"}} {n}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path=None):
+    """
+    Atomically write prometheus_text() to path (default: $ENERGY_AI_PROMETHEUS_FILE).
+    Returns the path written, or None when no path is configured.
+    """
+    path = path or os.environ.get(PROMETHEUS_FILE_ENV)
+    if not path:
+        return None
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # Unique per writer: sessions of one server share a pid.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(prometheus_text())
+        # mkstemp creates the file 0600; the collector may run as another user.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
@@ -0,0 +1,234 @@
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+LIVE_COLUMNS = ['timestamp', 'meter_id', 'energy_consumption_kwh']
+DEFAULT_INTERVAL_S = 900  # 15-minute meter readings
+DEFAULT_CAPACITY = 96 * 7  # one week of 15-minute intervals per meter
+
+
+class RingBuffer:
+    """
+    Fixed-size per-meter history: an (n_meters, capacity) array of readings
+    written in place, plus running window sums updated on every append.
+    """
+
+    def __init__(self, n_meters, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.values = np.full((n_meters, capacity), np.nan)
+        self.timestamps = np.zeros((n_meters, capacity), dtype=np.int64)
+        self.counts = np.zeros(n_meters, dtype=np.int64)
+        self.window_sum = np.zeros(n_meters)
+        self.lifetime_sum = np.zeros(n_meters)
+
+    def append(self, meter_idx, timestamps, values):
+        """
+        Write a batch of readings. Arrays are aligned; a meter may appear many times.
+        """
+        order = np.argsort(meter_idx, kind='stable')
+        meter_idx, timestamps, values = meter_idx[order], timestamps[order], values[order]
+
+        # Rank of each reading within its meter for this batch.
+        starts = np.r_[0, np.flatnonzero(np.diff(meter_idx)) + 1]
+        sizes = np.diff(np.r_[starts, len(meter_idx)])
+        rank = np.arange(len(meter_idx)) - np.repeat(starts, sizes)
+
+        batch_counts = np.bincount(meter_idx, minlength=len(self.counts))
+
+        # Blank readings are kept as NaN but count as zero in the running sums,
+        # so a single gap cannot poison them.
+        np.add.at(self.lifetime_sum, meter_idx, np.nan_to_num(values))
+
+        # Only the newest `capacity` readings of a meter can survive this batch.
+        keep = rank >= np.repeat(sizes, sizes) - self.capacity
+        meter_idx, timestamps, values, rank = meter_idx[keep], timestamps[keep], values[keep], rank[keep]
+        addend = np.nan_to_num(values)
+
+        slots = (self.counts[meter_idx] + rank) % self.capacity
+        evicted = self.values[meter_idx, slots]
+        np.subtract.at(self.window_sum, meter_idx, np.nan_to_num(evicted))
+        np.add.at(self.window_sum, meter_idx, addend)
+
+        self.values[meter_idx, slots] = values
+        self.timestamps[meter_idx, slots] = timestamps
+        self.counts += batch_counts
+
+    def latest(self):
+        """
+        Most recent reading per meter (NaN for meters that never reported).
+        """
+        slot = (self.counts - 1) % self.capacity
+        latest = self.values[np.arange(len(self.counts)), slot]
+        return np.where(self.counts > 0, latest, np.nan)
+
+
+class FleetSeries:
+    """
+    Ring of fleet-wide totals per interval, used for the live trend chart.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, interval_s=DEFAULT_INTERVAL_S):
+        self.capacity = capacity
+        self.interval_s = interval_s
+        self.interval = np.full(capacity, -1, dtype=np.int64)
+        self.totals = np.zeros(capacity)
+        self.readings = np.zeros(capacity, dtype=np.int64)
+
+    def add(self, timestamps, values):
+        interval = timestamps // self.interval_s
+        slots = interval % self.capacity
+
+        # A slot is reset when a newer interval claims it; late readings for
+        # intervals that already fell out of the window are ignored.
+        newest = self.interval.copy()
+        np.maximum.at(newest, slots, interval)
+        reset = newest != self.interval
+        self.totals[reset] = 0.0
+        self.readings[reset] = 0
+        self.interval = newest
+
+        current = self.interval[slots] == interval
+        np.add.at(self.totals, slots[current], np.nan_to_num(values[current]))
+        np.add.at(self.readings, slots[current], 1)
+
+    def frame(self):
+        valid = self.interval >= 0
+        order = np.argsort(self.interval[valid])
+        return pd.DataFrame({
+            'date': pd.to_datetime(self.interval[valid][order] * self.interval_s, unit='s'),
+            'energy_consumption_kwh': self.totals[valid][order],
+            'readings': self.readings[valid][order],
+        })
+
+
+class LiveState:
+    """
+    Live ingest state for up to max_meters meters: a per-meter RingBuffer,
+    a fleet trend ring and the meter_id -> row mapping.
+    """
+
+    def __init__(self, max_meters=1024, capacity=DEFAULT_CAPACITY, interval_s=DEFAULT_INTERVAL_S):
+        self.buffer = RingBuffer(max_meters, capacity)
+        self.fleet = FleetSeries(capacity, interval_s)
+        self.meter_ids = pd.Index([], dtype=object)
+        self.max_meters = max_meters
+        self.rows_ingested = 0
+        self.rows_dropped = 0
+
+    def _meter_index(self, meter_ids):
+        idx = self.meter_ids.get_indexer(meter_ids)
+        unknown = pd.unique(meter_ids[idx < 0])
+        if len(unknown):
+            room = self.max_meters - len(self.meter_ids)
+            self.meter_ids = self.meter_ids.append(pd.Index(unknown[:max(room, 0)]))
+            idx = self.meter_ids.get_indexer(meter_ids)
+        return idx
+
+    def ingest(self, frame):
+        """
+        Fold a batch of readings (columns LIVE_COLUMNS, timestamp in epoch seconds) into the buffers.
+        """
+        if frame.empty:
+            return 0
+        idx = self._meter_index(frame['meter_id'].to_numpy(dtype=object))
+        known = idx >= 0
+        timestamps = frame['timestamp'].to_numpy(dtype=np.int64)[known]
+        values = frame['energy_consumption_kwh'].to_numpy(dtype=float)[known]
+
+        self.buffer.append(idx[known], timestamps, values)
+        self.fleet.add(timestamps, values)
+        self.rows_ingested += int(known.sum())
+        self.rows_dropped += int((~known).sum())
+        return int(known.sum())
+
+    def kpis(self):
+        n = len(self.meter_ids)
+        latest = self.buffer.latest()[:n]
+        return {
+            'meters': n,
+            'meters_reporting': int(np.count_nonzero(~np.isnan(latest))),
+            'latest_interval_kwh': float(np.nansum(latest)),
+            'window_kwh': float(self.buffer.window_sum[:n].sum()),
+            'lifetime_kwh': float(self.buffer.lifetime_sum[:n].sum()),
+            'rows_ingested': self.rows_ingested,
+            'rows_dropped': self.rows_dropped,
+        }
+
+
+class FileTailer:
+    """
+    Reads rows appended to a CSV file since the previous call.
+    A trailing partial line is left for the next read.
+    """
+
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self.offset = 0
+        if not from_start and os.path.exists(path):
+            self.offset = os.path.getsize(path)
+
+    def read_new(self):
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=LIVE_COLUMNS)
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0  # Source was truncated or rotated.
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame(columns=LIVE_COLUMNS)
+        self.offset += end
+
+        frame = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=LIVE_COLUMNS,
+                            dtype={'timestamp': 'int64', 'meter_id': str, 'energy_consumption_kwh': 'float64'},
+                            comment='#')
+        return frame
+
+
+def simulate_feed(path, n_meters=1000, intervals=1, start_ts=None, interval_s=DEFAULT_INTERVAL_S, seed=None):
+    """
+    Append `intervals` rounds of readings for n_meters meters to an append-only CSV source.
+    Stands in for a meter gateway or broker during development and benchmarks.
+    """
+    rng = np.random.default_rng(seed)
+    start_ts = int(time.time()) // interval_s * interval_s if start_ts is None else start_ts
+    meters = np.array([f"meter_{i:05d}" for i in range(n_meters)])
+
+    timestamps = np.repeat(start_ts + np.arange(intervals) * interval_s, n_meters)
+    hour = (timestamps % 86400) / 3600
+    base = 2.5 + 1.5 * np.sin((hour - 6) / 24 * 2 * np.pi)
+    values = np.maximum(base + rng.normal(0, 0.3, len(timestamps)), 0)
+
+    frame = pd.DataFrame({
+        'timestamp': timestamps,
+        'meter_id': np.tile(meters, intervals),
+        'energy_consumption_kwh': values.round(4),
+    })
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        frame.to_csv(f, header=False, index=False)
+    return start_ts + intervals * interval_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a simulated live meter feed.")
+    parser.add_argument('path')
+    parser.add_argument('--meters', type=int, default=1000)
+    parser.add_argument('--period', type=float, default=1.0,
+                        help="wall-clock seconds between simulated intervals")
+    args = parser.parse_args()
+
+    next_ts = None
+    while True:
+        next_ts = simulate_feed(args.path, args.meters, start_ts=next_ts)
+        time.sleep(args.period)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Versioned, content-addressed storage for fitted models.
+
+    version = save_model(model, 'forecast_model', meta={'baseline_mae': 812.4})
+    model = load_model('forecast_model')            # latest version
+    model = load_model('site_00042', version=version)
+
+Layout under MODELS_DIR (anchored to the package, not the working directory;
+override with ENERGY_AI_MODELS_DIR):
+
+    objects/<sha256>.joblib   immutable model files, named by content hash
+    refs/<name>.json          current version, recent history and metadata
+
+Every file is written to a temporary name in the same directory and renamed
+into place, so concurrent workers never observe a partial file and the last
+writer of a ref wins.
+
+Loaded models are kept in a process-wide LRU keyed by version, so all sessions
+of a Streamlit server share one copy, and concurrent first loads of a version
+read the file once. load_model(..., mmap_mode='r') serves the numpy arrays of
+a pickle from the shared page cache, which helps models that use their arrays
+as-is. Random forests gain nothing from it: sklearn copies every tree's node
+arrays into its own buffers on unpickle, and the extra per-array mapping makes
+loading slower (see benchmarks.bench_model_store).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from .instrumentation import span
+from .serving import SingleFlight
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.environ.get('ENERGY_AI_MODELS_DIR', os.path.join(PACKAGE_ROOT, 'models'))
+
+KEEP_VERSIONS = 5  # versions kept per name; older objects are pruned on save
+MODEL_CACHE_SIZE = 64  # loaded models kept per process
+
+
+def _objects_dir(root):
+    return os.path.join(root, 'objects')
+
+
+def _ref_path(root, name):
+    return os.path.join(root, 'refs', f"{name}.json")
+
+
+def object_path(version, root=None):
+    return os.path.join(_objects_dir(root or MODELS_DIR), f"{version}.joblib")
+
+
+def _atomic_write(path, write):
+    """
+    Call write(file) on a temp file next to path, then rename it over path.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_ref(name, root=None):
+    """
+    The ref of a model name ({'version', 'history', 'compress', 'meta', ...}), or None.
+    """
+    path = _ref_path(root or MODELS_DIR, name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_model(model, name, meta=None, compress=0, root=None):
+    """
+    Store model under its content hash and point `name` at it.
+
+    compress (0-9, or a joblib (method, level) tuple) trades load speed for
+    disk space; compressed objects cannot be memory-mapped.
+    Returns the version (content hash).
+    """
+    import joblib
+
+    root = root or MODELS_DIR
+    objects = _objects_dir(root)
+    os.makedirs(objects, exist_ok=True)
+
+    with span('model_store.save', model=name):
+        fd, tmp_path = tempfile.mkstemp(dir=objects, prefix='.tmp-')
+        os.close(fd)
+        try:
+            joblib.dump(model, tmp_path, compress=compress)
+            digest = hashlib.sha256()
+            with open(tmp_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            version = digest.hexdigest()
+            # Identical content already stored: keep the existing object.
+            if os.path.exists(object_path(version, root)):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, object_path(version, root))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        previous = read_ref(name, root)
+        history = [version] + [v for v in (previous or {}).get('history', []) if v != version]
+        ref = {
+            'name': name,
+            'version': version,
+            'history': history[:KEEP_VERSIONS],
+            'compress': bool(compress),
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'meta': meta or {},
+        }
+        _atomic_write(_ref_path(root, name), lambda f: f.write(json.dumps(ref, indent=2).encode()))
+        _prune(history[KEEP_VERSIONS:], root)
+    return version
+
+
+def _prune(versions, root):
+    """
+    Delete objects that dropped out of a name's history and no other ref uses.
+    """
+    if not versions:
+        return
+    refs_dir = os.path.join(root, 'refs')
+    in_use = set()
+    for ref_name in os.listdir(refs_dir):
+        if ref_name.endswith('.json'):
+            in_use.update((read_ref(ref_name[:-5], root) or {}).get('history', []))
+    for version in versions:
+        path = object_path(version, root)
+        if version not in in_use and os.path.exists(path):
+            # Processes that already mapped the file keep their view until they close it.
+            os.remove(path)
+
+
+_loaded = OrderedDict()  # (root, version, mmap_mode) -> model
+_loaded_lock = threading.Lock()
+_load_flight = SingleFlight()
+
+
+def _read_object(path, mmap_mode):
+    import joblib
+
+    with span('model_store.load', mmap=bool(mmap_mode)):
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def _load_object(path, key, mmap_mode, cache=True):
+    if not cache:
+        return _read_object(path, mmap_mode)
+    with _loaded_lock:
+        if key in _loaded:
+            _loaded.move_to_end(key)
+            return _loaded[key]
+
+    def load():
+        with _loaded_lock:
+            if key in _loaded:
+                return _loaded[key]
+        model = _read_object(path, mmap_mode)
+        with _loaded_lock:
+            _loaded[key] = model
+            if len(_loaded) > MODEL_CACHE_SIZE:
+                _loaded.popitem(last=False)
+        return model
+
+    return _load_flight.do(key, load)
+
+
+def load_model(name, version=None, mmap_mode=None, root=None, cache=True):
+    """
+    Load the latest (or a specific) version of a model, or None if nothing is stored.
+
+    Versions are immutable, so loaded models are kept in a per-process LRU and
+    shared until the ref moves to a new version. Callers that modify the model
+    (e.g. refit it) must pass cache=False to get a private copy. A legacy
+    MODELS_DIR/<name>.pkl file is loaded when no ref exists yet.
+    """
+    root = root or MODELS_DIR
+    ref = read_ref(name, root)
+    if ref is None and version is None:
+        legacy = os.path.join(root, f"{name}.pkl")
+        if not os.path.exists(legacy):
+            return None
+        return _load_object(legacy, (legacy, os.path.getmtime(legacy), mmap_mode), mmap_mode, cache)
+
+    version = version or ref['version']
+    path = object_path(version, root)
+    if not os.path.exists(path):
+        return None
+    if ref is not None and ref.get('compress'):
+        mmap_mode = None
+    return _load_object(path, (root, version, mmap_mode), mmap_mode, cache)
+
+
+def load_meta(name, root=None):
+    """
+    Metadata saved with the current version of a model, or None.
+    """
+    ref = read_ref(name, root)
+    return None if ref is None else ref['meta']
+
+
+def list_models(root=None):
+    """
+    Names that have a ref in the store.
+    """
+    refs_dir = os.path.join(root or MODELS_DIR, 'refs')
+    if not os.path.isdir(refs_dir):
+        return []
+    return sorted(name[:-5] for name in os.listdir(refs_dir) if name.endswith('.json'))
+
+
+def clear_loaded():
+    """
+    Drop this process's loaded-model cache.
+    """
+    with _loaded_lock:
+        _loaded.clear()
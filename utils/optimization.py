@@ -1,3 +1,11 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import timed
+
 def optimize_energy(current_annual_energy, current_annual_cost, current_annual_emissions, reduction_pct, strategy_type):
     """
     Calculate new metrics based on reduction percentage and strategy.
@@ -48,10 +56,11 @@ def optimize_energy(current_annual_energy, current_annual_cost, current_annual_e
         pass
         
     elif strategy_type == "Peak Hour Optimization":
-        # Might reduce cost more than energy if peak rates are high.
-        # But requirements say: "new_cost = new_energy * cost_per_kwh"
-        # So cost reduces linearly with energy in this simplified model.
-        pass
+        # Shifting flexible load into cheaper time-of-use hours lowers cost on top
+        # of the energy reduction; the factor comes from optimize_load_shift on a
+        # typical daily profile.
+        new_cost = new_cost * peak_shift_cost_factor()
+        annual_savings = current_annual_cost - new_cost
 
     return {
         "new_energy": new_energy,
@@ -61,3 +70,205 @@ def optimize_energy(current_annual_energy, current_annual_cost, current_annual_e
         "roi": roi,
         "investment": investment
     }
+
+STRATEGIES = ["Peak Hour Optimization", "Renewable Integration", "Efficiency Upgrade"]
+
+# Default up-front investment per strategy, as assumed by optimize_energy.
+STRATEGY_INVESTMENT = {
+    "Peak Hour Optimization": 0.0,
+    "Renewable Integration": 50000.0,
+    "Efficiency Upgrade": 0.0,
+}
+
+@timed()
+def optimize_energy_grid(current_annual_energy, current_annual_cost, current_annual_emissions,
+                         reduction_pct, strategies=STRATEGIES, investment=None,
+                         tariff_multiplier=1.0, site_ids=None):
+    """
+    Vectorized optimize_energy over the full cartesian grid of
+    sites x strategies x reduction_pct x investment x tariff_multiplier.
+
+    The three baseline arguments are scalars or aligned per-site arrays.
+    reduction_pct, investment and tariff_multiplier accept scalars or 1-D arrays.
+    investment=None uses STRATEGY_INVESTMENT; an explicit investment level applies
+    to every strategy. tariff_multiplier scales the baseline cost (e.g. 1.2 = +20% tariff).
+
+    Returns a DataFrame with one row per combination. 'roi' is the payback
+    period in years (investment / annual_savings), 0 where there is no investment.
+    """
+    energy = np.atleast_1d(np.asarray(current_annual_energy, dtype=float))
+    cost = np.atleast_1d(np.asarray(current_annual_cost, dtype=float))
+    emissions = np.atleast_1d(np.asarray(current_annual_emissions, dtype=float))
+    energy, cost, emissions = np.broadcast_arrays(energy, cost, emissions)
+
+    strategies = list(strategies)
+    reductions = np.atleast_1d(np.asarray(reduction_pct, dtype=float))
+    tariffs = np.atleast_1d(np.asarray(tariff_multiplier, dtype=float))
+
+    if investment is None:
+        investments = np.array([STRATEGY_INVESTMENT.get(s, 0.0) for s in strategies])[:, None]
+    else:
+        investments = np.atleast_1d(np.asarray(investment, dtype=float))[None, :]
+    n_investments = investments.shape[1]
+
+    # Axes: site, strategy, reduction, investment, tariff
+    shape = (len(energy), len(strategies), len(reductions), n_investments, len(tariffs))
+    site_axis = (slice(None), None, None, None, None)
+    savings_factor = (reductions / 100.0)[None, None, :, None, None]
+    tariff = tariffs[None, None, None, None, :]
+    cost_factor = np.array([
+        peak_shift_cost_factor() if s == "Peak Hour Optimization" else 1.0 for s in strategies
+    ])[None, :, None, None, None]
+
+    base_cost = cost[site_axis] * tariff
+    new_energy = energy[site_axis] * (1 - savings_factor)
+    new_cost = base_cost * (1 - savings_factor) * cost_factor
+    new_emissions = emissions[site_axis] * (1 - savings_factor)
+    annual_savings = base_cost - new_cost
+    invest = investments[None, :, None, :, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where((annual_savings > 0) & (invest > 0), invest / annual_savings, 0.0)
+
+    def flat(a):
+        return np.broadcast_to(a, shape).ravel()
+
+    idx = np.indices(shape, sparse=True)
+    site_labels = np.arange(len(energy)) if site_ids is None else np.asarray(site_ids)
+    return pd.DataFrame({
+        'site': flat(site_labels[idx[0]]),
+        'strategy': pd.Categorical.from_codes(flat(idx[1]), strategies),
+        'reduction_pct': flat(reductions[idx[2]]),
+        'investment': flat(np.broadcast_to(invest, (1,) + shape[1:])),
+        'tariff_multiplier': flat(tariffs[idx[4]]),
+        'new_energy': flat(new_energy),
+        'new_cost': flat(new_cost),
+        'new_emissions': flat(new_emissions),
+        'annual_savings': flat(annual_savings),
+        'roi': flat(roi),
+    })
+
+# Time-of-use tariff as (start_hour, end_hour, price multiplier) bands over a day.
+DEFAULT_TOU_TABLE = [
+    (0, 7, 0.70),    # off-peak
+    (7, 16, 1.00),   # shoulder
+    (16, 21, 1.60),  # peak
+    (21, 24, 0.85),  # evening shoulder
+]
+
+# Typical commercial daily load shape (share of daily kWh per hour).
+TYPICAL_DAILY_PROFILE = np.array([
+    2.5, 2.3, 2.2, 2.2, 2.3, 2.7, 3.5, 4.6, 5.2, 5.4, 5.5, 5.6,
+    5.6, 5.6, 5.5, 5.5, 5.6, 5.7, 5.4, 4.8, 4.0, 3.4, 3.0, 2.7,
+])
+TYPICAL_DAILY_PROFILE = TYPICAL_DAILY_PROFILE / TYPICAL_DAILY_PROFILE.sum()
+
+PEAK_FLEXIBLE_SHARE = 0.2
+SHIFT_CHUNK_SITES = 256
+
+def tou_tariff(n_hours, base_price=1.0, table=DEFAULT_TOU_TABLE):
+    """
+    Hourly price array of length n_hours built by repeating the daily TOU table.
+    """
+    daily = np.empty(24)
+    for start, end, multiplier in table:
+        daily[start:end] = base_price * multiplier
+    return np.resize(daily, n_hours)
+
+def _shift_window(load, price, flexible_share, capacity, max_increase):
+    """
+    Exact solution of the per-window LP: the flexible pool is poured into the
+    cheapest hours first, each hour limited by capacity and the comfort bound.
+    An hour may always take back its own flexible load, so the pool always
+    fits and load that cannot move anywhere cheaper stays where it was.
+    Arrays are (sites, windows, hours_per_window); price broadcasts against load.
+    """
+    flexible = load * flexible_share
+    fixed = load - flexible
+    pool = flexible.sum(axis=-1, keepdims=True)
+
+    headroom = np.minimum(capacity - fixed, load * (1 + max_increase) - fixed)
+    headroom = np.maximum(headroom, flexible)
+
+    order = np.argsort(np.broadcast_to(price, load.shape), axis=-1, kind='stable')
+    headroom_sorted = np.take_along_axis(headroom, order, axis=-1)
+    filled_before = np.cumsum(headroom_sorted, axis=-1) - headroom_sorted
+    placed_sorted = np.clip(pool - filled_before, 0.0, headroom_sorted)
+
+    placed = np.empty_like(placed_sorted)
+    np.put_along_axis(placed, order, placed_sorted, axis=-1)
+    return fixed + placed
+
+@timed()
+def optimize_load_shift(load, tariff, flexible_share=PEAK_FLEXIBLE_SHARE, capacity=None,
+                        max_increase=0.5, window_hours=24, chunk_sites=SHIFT_CHUNK_SITES):
+    """
+    Cost-minimizing shift of flexible load under a time-of-use tariff.
+
+    load: (n_sites, n_hours) interval kWh, n_hours a multiple of window_hours.
+    tariff: (n_hours,) or (n_sites, n_hours) price per kWh.
+    flexible_share: fraction of each hour's load that may be moved.
+    capacity: per-site hourly limit (scalar or (n_sites,)); defaults to each
+        site's current peak, so shifting never creates a new peak. Hours
+        already above a lower capacity receive no extra load but keep their own.
+    max_increase: comfort bound, an hour may rise by at most this share of its load.
+    Load only moves within its window (a day by default), and the window's
+    total energy is preserved.
+
+    Returns (shifted_load, metrics) where metrics includes per-site costs and
+    solve-time figures.
+    """
+    load = np.asarray(load, dtype=float)
+    if load.ndim == 1:
+        load = load[None, :]
+    n_sites, n_hours = load.shape
+    if n_hours % window_hours:
+        raise ValueError(f"n_hours ({n_hours}) must be a multiple of window_hours ({window_hours})")
+
+    tariff = np.asarray(tariff, dtype=float)
+    per_site_tariff = tariff.ndim == 2
+    if capacity is None:
+        capacity = load.max(axis=1)
+    capacity = np.broadcast_to(np.asarray(capacity, dtype=float), (n_sites,))
+
+    t0 = time.perf_counter()
+    shifted = np.empty_like(load)
+    n_windows = n_hours // window_hours
+    for start in range(0, n_sites, chunk_sites):
+        rows = slice(start, start + chunk_sites)
+        chunk = load[rows].reshape(-1, n_windows, window_hours)
+        price = tariff[rows] if per_site_tariff else tariff
+        shifted[rows] = _shift_window(
+            chunk,
+            price.reshape(-1, n_windows, window_hours),
+            flexible_share,
+            capacity[rows, None, None],
+            max_increase,
+        ).reshape(-1, n_hours)
+    solve_s = time.perf_counter() - t0
+
+    price = np.broadcast_to(tariff, load.shape)
+    base_cost = (load * price).sum(axis=1)
+    new_cost = (shifted * price).sum(axis=1)
+
+    metrics = {
+        'base_cost': base_cost,
+        'new_cost': new_cost,
+        'savings': base_cost - new_cost,
+        'shifted_kwh': np.maximum(shifted - load, 0).sum(axis=1),
+        'peak_before': load.max(axis=1),
+        'peak_after': shifted.max(axis=1),
+        'solve_s': solve_s,
+        'sites_per_s': n_sites / solve_s if solve_s > 0 else float('inf'),
+        'site_hours_per_s': n_sites * n_hours / solve_s if solve_s > 0 else float('inf'),
+    }
+    return shifted, metrics
+
+@lru_cache(maxsize=None)
+def peak_shift_cost_factor(flexible_share=PEAK_FLEXIBLE_SHARE):
+    """
+    Ratio of shifted to unshifted cost for a typical daily profile under the
+    default TOU tariff. Used to scale annual cost for "Peak Hour Optimization".
+    """
+    _, metrics = optimize_load_shift(TYPICAL_DAILY_PROFILE, tou_tariff(24), flexible_share)
+    return float(metrics['new_cost'][0] / metrics['base_cost'][0])
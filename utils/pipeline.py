@@ -0,0 +1,275 @@
+"""
+Headless batch runner that precomputes every dashboard artifact.
+
+    python -m utils.pipeline --synthetic-sites 200 --sites site_00001,site_00002
+    python -m utils.pipeline --data meters.csv --run-id nightly --resume
+
+Each stage writes a Parquet file under ARTIFACTS_DIR/<run_id>/. Re-running with
+the same run id and --resume skips stages whose output already exists and whose
+inputs (data source, site filter, forecast options) match the manifest. A
+finished run is recorded in ARTIFACTS_DIR/LATEST, which app.py reads.
+ARTIFACTS_DIR sits next to the code; set ENERGY_AI_ARTIFACTS_DIR to move it.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import portfolio_monthly, site_kpis
+from .data_loader import generate_synthetic_data, load_csv
+from .forecasting import BACKENDS, DEFAULT_BACKEND, MAX_HORIZON, TARGET, train_and_forecast, train_and_forecast_batch
+from .instrumentation import span, write_prometheus
+from .optimization import optimize_energy_grid
+from .recommendation import fleet_recommendations
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.environ.get('ENERGY_AI_ARTIFACTS_DIR', os.path.join(PACKAGE_ROOT, 'artifacts'))
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+SCENARIO_REDUCTIONS = np.arange(1, 51)
+
+STAGES = ['load', 'kpis', 'forecast', 'portfolio_forecast', 'scenarios', 'recommendations']
+
+# Arguments recorded in the manifest. A resumed run recomputes every stage when
+# a LOAD_INPUTS value changed, and the forecast stages when a FORECAST_INPUTS one did.
+LOAD_INPUTS = ['data', 'synthetic_sites', 'months', 'sites']
+FORECAST_INPUTS = ['forecast_mode', 'forecast_backend']
+FORECAST_STAGES = ['forecast', 'portfolio_forecast']
+
+
+def _stage_load(ctx):
+    if ctx['args'].data:
+        # Read strictly: a bad path or schema fails the run instead of publishing synthetic data.
+        df = load_csv(ctx['args'].data)
+    elif ctx['args'].synthetic_sites:
+        df = generate_synthetic_data(ctx['args'].months, n_sites=ctx['args'].synthetic_sites)
+    else:
+        df = generate_synthetic_data(ctx['args'].months)
+
+    if 'site_id' not in df.columns:
+        df = df.assign(site_id='site_00000')
+    if ctx['sites']:
+        df = df[df['site_id'].isin(ctx['sites'])]
+    return {'data': df}
+
+
+def _stage_kpis(ctx):
+    return {'kpis': site_kpis(ctx['read']('data')).reset_index()}
+
+
+def _stage_forecast(ctx):
+    forecast, mae = train_and_forecast_batch(
+        ctx['read']('data'), mode=ctx['args'].forecast_mode, n_jobs=ctx['args'].n_jobs,
+        backend=ctx['args'].forecast_backend
+    )
+    return {
+        'forecast': forecast,
+        'forecast_mae': mae.rename('mae').rename_axis('site_id').reset_index(),
+    }
+
+
+def _stage_portfolio_forecast(ctx):
+    # Full horizon once; the dashboard slices the first N months, which equals
+    # an N-month recursive forecast from the same model.
+    portfolio = portfolio_monthly(ctx['read']('data'))
+    forecast, mae = train_and_forecast(portfolio, save=False, horizon=MAX_HORIZON, interval=0.9,
+                                       backend=ctx['args'].forecast_backend)
+    if forecast is None:
+        forecast = pd.DataFrame(columns=['date', TARGET, 'forecast', 'lower', 'upper'])
+    ctx['manifest']['portfolio_mae'] = float(mae)
+    return {'portfolio_forecast': forecast}
+
+
+def _stage_scenarios(ctx):
+    kpis = ctx['read']('kpis')
+    scenarios = optimize_energy_grid(
+        kpis['annual_energy_kwh'].to_numpy(),
+        kpis['annual_cost'].to_numpy(),
+        kpis['annual_emission'].to_numpy(),
+        SCENARIO_REDUCTIONS,
+        site_ids=kpis['site_id'].astype(str).to_numpy(),
+    )
+    return {'scenarios': scenarios.rename(columns={'site': 'site_id'})}
+
+
+def _stage_recommendations(ctx):
+    kpis = ctx['read']('kpis').set_index('site_id')
+    table = fleet_recommendations(ctx['read']('data'), kpis=kpis)
+    return {'recommendations': table.rename_axis('site_id').reset_index()}
+
+
+STAGE_FUNCS = {
+    'load': _stage_load,
+    'kpis': _stage_kpis,
+    'forecast': _stage_forecast,
+    'portfolio_forecast': _stage_portfolio_forecast,
+    'scenarios': _stage_scenarios,
+    'recommendations': _stage_recommendations,
+}
+
+STAGE_OUTPUTS = {
+    'load': ['data'],
+    'kpis': ['kpis'],
+    'forecast': ['forecast', 'forecast_mae'],
+    'portfolio_forecast': ['portfolio_forecast'],
+    'scenarios': ['scenarios'],
+    'recommendations': ['recommendations'],
+}
+
+
+def _artifact_path(run_dir, name):
+    return os.path.join(run_dir, f"{name}.parquet")
+
+
+def _write_artifact(run_dir, name, frame):
+    path = _artifact_path(run_dir, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _stale_stages(saved, inputs):
+    """
+    Stages whose saved artifacts were computed from different inputs.
+    Manifests without recorded inputs are treated as entirely stale.
+    """
+    if saved is None or any(saved.get(name) != inputs[name] for name in LOAD_INPUTS):
+        return set(STAGES)
+    if any(saved.get(name) != inputs[name] for name in FORECAST_INPUTS):
+        return set(FORECAST_STAGES)
+    return set()
+
+
+def run_pipeline(args):
+    run_id = args.run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+    run_dir = os.path.join(args.artifacts_dir, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    print(f"run {run_id} -> {run_dir}")
+
+    manifest_path = os.path.join(run_dir, MANIFEST_FILE)
+    manifest = {}
+    if args.resume and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    inputs = {name: getattr(args, name) for name in LOAD_INPUTS + FORECAST_INPUTS}
+    if args.resume:
+        # Drop artifacts computed from other inputs so they are never reused or published.
+        for stage in _stale_stages(manifest.get('inputs'), inputs):
+            paths = [_artifact_path(run_dir, name) for name in STAGE_OUTPUTS[stage]]
+            if any(os.path.exists(path) for path in paths):
+                print(f"  {stage:<20} invalidated (inputs differ from the saved run)")
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            manifest.get('stages', {}).pop(stage, None)
+    manifest.update({'run_id': run_id, 'sites_filter': args.sites, 'inputs': inputs,
+                     'forecast_backend': args.forecast_backend})
+    manifest.setdefault('stages', {})
+
+    cache = {}
+
+    def read(name):
+        if name not in cache:
+            cache[name] = pd.read_parquet(_artifact_path(run_dir, name))
+        return cache[name]
+
+    ctx = {
+        'args': args,
+        'sites': args.sites.split(',') if args.sites else None,
+        'read': read,
+        'manifest': manifest,
+    }
+
+    stages = args.stages or STAGES
+    for stage in stages:
+        outputs = STAGE_OUTPUTS[stage]
+        done = all(os.path.exists(_artifact_path(run_dir, name)) for name in outputs)
+        if args.resume and done:
+            print(f"  {stage:<20} skipped (already computed)")
+            continue
+
+        t0 = time.perf_counter()
+        with span(f'pipeline.{stage}', run_id=run_id):
+            frames = STAGE_FUNCS[stage](ctx)
+            for name, frame in frames.items():
+                _write_artifact(run_dir, name, frame)
+                cache[name] = frame
+        elapsed = time.perf_counter() - t0
+
+        rows = sum(len(f) for f in frames.values())
+        manifest['stages'][stage] = {'seconds': elapsed, 'rows': rows, 'finished_at': datetime.now()}
+        _write_json(manifest_path, manifest)
+        print(f"  {stage:<20} {elapsed:8.2f}s  {rows:>12,} rows")
+
+    if all(
+        os.path.exists(_artifact_path(run_dir, name)) for outputs in STAGE_OUTPUTS.values() for name in outputs
+    ):
+        with open(os.path.join(args.artifacts_dir, LATEST_FILE), 'w') as f:
+            f.write(run_id)
+    write_prometheus()
+    return run_dir
+
+
+def latest_run_dir(artifacts_dir=ARTIFACTS_DIR):
+    """
+    Directory of the most recent complete run, or None if nothing has been precomputed.
+    """
+    pointer = os.path.join(artifacts_dir, LATEST_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        run_dir = os.path.join(artifacts_dir, f.read().strip())
+    return run_dir if os.path.isdir(run_dir) else None
+
+
+def load_artifacts(run_dir=None, names=None):
+    """
+    Read precomputed artifacts of a run (default: the latest) into a dict of frames.
+    The run manifest is included under 'manifest'. Returns None when no run exists.
+    """
+    run_dir = run_dir or latest_run_dir()
+    if run_dir is None:
+        return None
+
+    names = names or [name for outputs in STAGE_OUTPUTS.values() for name in outputs]
+    artifacts = {name: pd.read_parquet(_artifact_path(run_dir, name)) for name in names}
+    with open(os.path.join(run_dir, MANIFEST_FILE)) as f:
+        artifacts['manifest'] = json.load(f)
+    return artifacts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute dashboard artifacts.")
+    parser.add_argument('--data', help="CSV export to load (synthetic data if omitted)")
+    parser.add_argument('--synthetic-sites', type=int, help="generate a synthetic fleet with this many sites")
+    parser.add_argument('--months', type=int, default=24, help="months of synthetic history")
+    parser.add_argument('--sites', help="comma-separated site_id filter")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, help="run only these stages")
+    parser.add_argument('--run-id', help="run directory name (default: timestamp)")
+    parser.add_argument('--resume', action='store_true', help="skip stages whose artifacts already exist")
+    parser.add_argument('--forecast-mode', choices=['pooled', 'per_series'], default='per_series')
+    parser.add_argument('--forecast-backend', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help="forecasting model (default from ENERGY_AI_FORECAST_BACKEND, else random_forest)")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="process pool size for per-site forecasting")
+    parser.add_argument('--artifacts-dir', default=ARTIFACTS_DIR)
+    return parser.parse_args(argv)
+
+
+def main():
+    run_pipeline(parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from .aggregation import SITE_KEY, site_kpis, site_monthly
+from .instrumentation import timed
+
+COST_RISING_PCT = 5.0  # month-over-month cost increase that triggers action
+ANOMALY_WINDOW = 12  # months of history behind each anomaly z-score
+ANOMALY_MIN_PERIODS = 6
+ANOMALY_Z = 3.0
+
+# Severity of each strategy, used to rank sites needing action.
+STRATEGY_SEVERITY = {
+    'Renewable Integration': 3,
+    'Peak Hour Optimization': 2,
+    'Efficiency Upgrade': 1,
+    'Investigate Anomaly': 0,  # anomalous latest month without a cost or emission trigger
+    'Monitor': 0,
+}
+
+STRATEGY_TEXT = {
+    'Renewable Integration': (
+        "**Critical Strategic Pivot Required:** Both operational costs and carbon emissions are statistically elevated. "
+        "Immediate intervention recommended: **Renewable Energy Integration**. "
+        "This strategy addresses both fiscal efficiency and sustainability targets simultaneously."
+    ),
+    'Peak Hour Optimization': (
+        "**Cost Contaminment Alert:** Energy expenditures are trending upwards (>5% MoM). "
+        "Recommended Action: **Peak Hour Load Shifting**. "
+        "Optimizing consumption during non-peak tariff periods will stabilize operational significantly expenses."
+    ),
+    'Efficiency Upgrade': (
+        "**Sustainability Target Risk:** Carbon footprint indicators are above nominal thresholds. "
+        "Recommended Action: **Infrastructure Efficiency Upgrades**. "
+        "Modernizing equipment will directly reduce KWh consumption and associated emissions."
+    ),
+    'Investigate Anomaly': (
+        "**Consumption Anomaly Detected:** Last month's energy use deviates sharply from recent history "
+        "while costs and emissions remain within expected variance. "
+        "Recommended Action: **Investigate Metering and Operations** at the flagged sites before it shows up in the bill."
+    ),
+    'Monitor': (
+        "**Operations Nominal:** Energy consumption and costs are within expected variance. "
+        "Recommendation: Maintain current monitoring protocols and evaluate long-term **Renewable Integration** for future-proofing."
+    ),
+}
+
 def generate_recommendation(cost_trend_pct, emission_level, renewable_share=0):
     """
     Generate executive strategic recommendation based on trends.
@@ -14,13 +61,10 @@ def generate_recommendation(cost_trend_pct, emission_level, renewable_share=0):
     # Let's assume input 'emission_level' is a string label or we infer "high" from data context in app.py.
     # Actually, simpler: pass boolean flags or raw values.
     
-    recommendation_text = ""
-    strategy_suggestion = ""
-    
     is_high_emissions = False
     is_cost_rising = False
     
-    if cost_trend_pct > 5.0:
+    if cost_trend_pct > COST_RISING_PCT:
         is_cost_rising = True
         
     # We'll need a heuristic for "high emissions". 
@@ -34,34 +78,96 @@ def generate_recommendation(cost_trend_pct, emission_level, renewable_share=0):
         is_high_emissions = True
         
     if is_high_emissions and is_cost_rising:
-        recommendation_text = (
-            "**Critical Strategic Pivot Required:** Both operational costs and carbon emissions are statistically elevated. "
-            "Immediate intervention recommended: **Renewable Energy Integration**. "
-            "This strategy addresses both fiscal efficiency and sustainability targets simultaneously."
-        )
         strategy_suggestion = "Renewable Integration"
-        
     elif is_cost_rising:
-        recommendation_text = (
-            "**Cost Contaminment Alert:** Energy expenditures are trending upwards (>5% MoM). "
-            "Recommended Action: **Peak Hour Load Shifting**. "
-            "Optimizing consumption during non-peak tariff periods will stabilize operational significantly expenses."
-        )
         strategy_suggestion = "Peak Hour Optimization"
-        
     elif is_high_emissions:
-        recommendation_text = (
-            "**Sustainability Target Risk:** Carbon footprint indicators are above nominal thresholds. "
-            "Recommended Action: **Infrastructure Efficiency Upgrades**. "
-            "Modernizing equipment will directly reduce KWh consumption and associated emissions."
-        )
         strategy_suggestion = "Efficiency Upgrade"
-        
     else:
-        recommendation_text = (
-            "**Operations Nominal:** Energy consumption and costs are within expected variance. "
-            "Recommendation: Maintain current monitoring protocols and evaluate long-term **Renewable Integration** for future-proofing."
-        )
         strategy_suggestion = "Monitor"
         
+    recommendation_text = STRATEGY_TEXT[strategy_suggestion]
     return recommendation_text, strategy_suggestion
+
+
+def detect_anomalies(monthly, metric='energy_consumption_kwh', window=ANOMALY_WINDOW,
+                     min_periods=ANOMALY_MIN_PERIODS, z_threshold=ANOMALY_Z):
+    """
+    Rolling z-score of each month against the preceding `window` months of its site.
+
+    monthly must be sorted by site then date (as site_monthly returns it).
+    All sites are scored in one pass over flat arrays: windowed sums come from
+    cumulative sums, and a window never reaches past the start of its site.
+    Adds '<metric>_z' and 'anomaly' columns; months with fewer than min_periods
+    months of history get z = NaN and are never flagged.
+    """
+    position = monthly.groupby(SITE_KEY, observed=True, sort=False).cumcount().to_numpy()
+    values = monthly[metric].to_numpy(dtype=float)
+    # Centre on the site mean so the running sums of squares stay well conditioned.
+    centred = values - monthly.groupby(SITE_KEY, observed=True, sort=False)[metric].transform('mean').to_numpy()
+
+    csum = np.concatenate([[0.0], np.cumsum(centred)])
+    csq = np.concatenate([[0.0], np.cumsum(centred ** 2)])
+    idx = np.arange(len(values))
+    n = np.minimum(position, window)
+    start = idx - n
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = (csum[idx] - csum[start]) / n
+        var = (csq[idx] - csq[start] - n * mean ** 2) / (n - 1)
+        z = (centred - mean) / np.sqrt(np.maximum(var, 0))
+    z[(n < min_periods) | ~np.isfinite(z)] = np.nan
+
+    out = monthly.copy()
+    out[f'{metric}_z'] = z
+    out['anomaly'] = np.abs(z) > z_threshold
+    return out
+
+
+@timed()
+def fleet_recommendations(df, kpis=None, cost_rising_pct=COST_RISING_PCT, window=ANOMALY_WINDOW,
+                          z_threshold=ANOMALY_Z, trailing_months=12):
+    """
+    Fleet version of generate_recommendation: the same rules evaluated as
+    boolean array operations over every site, plus energy anomaly flags.
+
+    Returns one row per site, ranked so that sites needing action come first
+    (highest severity, then latest-month anomalies, then annual cost at stake).
+    Sites whose only trigger is an anomalous latest month get 'Investigate Anomaly'.
+    Columns:
+    strategy, severity, cost_trend_pct, emission_level, energy_z (latest month),
+    anomaly (latest month), anomalies_trailing (count over trailing_months),
+    annual_cost and action_required. Pass precomputed site_kpis output as kpis
+    to avoid recomputing it.
+    """
+    kpis = site_kpis(df) if kpis is None else kpis
+    scored = detect_anomalies(site_monthly(df), window=window, z_threshold=z_threshold)
+
+    groups = scored.groupby(SITE_KEY, observed=True, sort=False)
+    from_end = groups.cumcount(ascending=False).to_numpy()
+    latest = scored.loc[from_end == 0].set_index(SITE_KEY)
+    recent_anomalies = scored.loc[from_end < trailing_months].groupby(SITE_KEY, observed=True)['anomaly'].sum()
+
+    cost_rising = kpis['cost_trend_pct'].to_numpy() > cost_rising_pct
+    high_emissions = kpis['emission_level'].to_numpy() == 'High'
+    conditions = [cost_rising & high_emissions, cost_rising, high_emissions]
+    choices = ['Renewable Integration', 'Peak Hour Optimization', 'Efficiency Upgrade']
+    strategy = np.select(conditions, choices, default='Monitor')
+    severity = np.select(conditions, [STRATEGY_SEVERITY[c] for c in choices], default=0)
+    anomaly = latest['anomaly'].reindex(kpis.index, fill_value=False).to_numpy(dtype=bool)
+    strategy = np.where((strategy == 'Monitor') & anomaly, 'Investigate Anomaly', strategy)
+
+    table = pd.DataFrame({
+        'strategy': pd.Categorical(strategy, categories=list(STRATEGY_SEVERITY)),
+        'severity': severity,
+        'cost_trend_pct': kpis['cost_trend_pct'].to_numpy(),
+        'emission_level': kpis['emission_level'].to_numpy(),
+        'annual_cost': kpis['annual_cost'].to_numpy(),
+    }, index=kpis.index)
+    table['energy_z'] = latest['energy_consumption_kwh_z'].reindex(table.index)
+    table['anomaly'] = anomaly
+    table['anomalies_trailing'] = recent_anomalies.reindex(table.index, fill_value=0).astype(int)
+    table['action_required'] = (table['severity'] > 0) | table['anomaly']
+
+    return table.sort_values(['action_required', 'severity', 'anomaly', 'annual_cost'],
+                             ascending=False, kind='stable')
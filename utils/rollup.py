@@ -0,0 +1,209 @@
+"""
+Materialized rollups: metric sums and row counts per site and day / month / year.
+
+    cube = RollupCube.from_frame(df)
+    cube.append(new_rows)                                    # incremental
+    cube.totals('2024-01-01', '2024-06-30', grain='day')    # fleet sums over a date range
+    cube.trailing(12)                                        # per-site sums of each site's last 12 months
+    cube.fleet_totals()                                      # keys of aggregation.fleet_totals
+
+Each grain keeps a dense (sites, periods + 1, metrics + 1) array of prefix sums
+along the period axis, so any period range of a site is one subtraction.
+Appending only rewrites prefixes from the earliest period in the new rows on,
+which for readings arriving in time order is the last period or two.
+
+Memory per grain is sites x periods x (metrics + 1) x 8 bytes: 10k sites over
+10 years take about 38 MB at month grain but 1.2 GB at day grain, so large
+fleets should pass only the grains they query.
+"""
+import numpy as np
+import pandas as pd
+
+from .aggregation import METRICS, SITE_KEY
+from .instrumentation import timed
+
+GRAINS = {'day': 'D', 'month': 'M', 'year': 'Y'}
+COUNT = 'count'
+_NO_PERIOD = np.iinfo(np.int64).min
+
+
+def to_period(dates, grain):
+    """
+    Integer period ordinals (days, months or years since 1970) of datetime-likes.
+    """
+    dates = np.asarray(pd.to_datetime(dates), dtype='datetime64[ns]')
+    return dates.astype(f'datetime64[{GRAINS[grain]}]').astype(np.int64)
+
+
+def from_period(periods, grain):
+    return pd.to_datetime(np.asarray(periods).astype(f'datetime64[{GRAINS[grain]}]'))
+
+
+def _zero_missing(values):
+    """
+    Missing readings count as zero, as in a groupby sum. Columns without gaps
+    are passed through as-is rather than copied.
+    """
+    if np.isnan(values).any():
+        return np.nan_to_num(values)
+    return values
+
+
+class RollupCube:
+    """
+    Prefix sums of METRICS and row counts by site x period for each grain.
+    Frames without a site_id column are one site, as in site_monthly.
+    """
+
+    def __init__(self, grains=tuple(GRAINS), metrics=METRICS):
+        unknown = set(grains) - set(GRAINS)
+        if unknown:
+            raise ValueError(f"Unknown grains: {sorted(unknown)}")
+        self.grains = tuple(grains)
+        self.columns = list(metrics) + [COUNT]
+        self.site_ids = pd.Index([], dtype=object, name=SITE_KEY)
+        self.rows = 0
+        self.first = {g: None for g in self.grains}  # period at prefix index 0
+        self.prefix = {g: np.zeros((0, 1, len(self.columns))) for g in self.grains}
+        self.last = {g: np.zeros(0, dtype=np.int64) for g in self.grains}  # latest period per site
+
+    @classmethod
+    def from_frame(cls, df, grains=tuple(GRAINS), metrics=METRICS):
+        cube = cls(grains, metrics)
+        cube.append(df)
+        return cube
+
+    def _site_index(self, site_ids):
+        idx = self.site_ids.get_indexer(site_ids)
+        unknown = pd.unique(site_ids[idx < 0])
+        if len(unknown):
+            self.site_ids = self.site_ids.append(pd.Index(unknown, name=SITE_KEY))
+            idx = self.site_ids.get_indexer(site_ids)
+        return idx
+
+    @timed()
+    def append(self, df):
+        """
+        Fold new rows (date, optional site_id, METRICS) into every grain.
+        Rows may belong to new sites or to periods already in the cube.
+        """
+        if df.empty:
+            return 0
+        if SITE_KEY in df.columns:
+            # Map the distinct ids only, then broadcast through the codes.
+            codes, uniques = pd.factorize(df[SITE_KEY])
+            idx = self._site_index(np.asarray(uniques, dtype=object).astype(str).astype(object))[codes]
+        else:
+            idx = self._site_index(np.array(['site_00000'], dtype=object)).repeat(len(df))
+        values = [_zero_missing(df[col].to_numpy(dtype=float)) for col in self.columns[:-1]] + [None]
+        dates = df['date'].to_numpy(dtype='datetime64[ns]')
+
+        for grain in self.grains:
+            self._add(grain, idx, dates.astype(f'datetime64[{GRAINS[grain]}]').astype(np.int64), values)
+        self.rows += len(df)
+        return len(df)
+
+    def _add(self, grain, idx, periods, values):
+        n_sites = len(self.site_ids)
+        lo, hi = int(periods.min()), int(periods.max())
+        prefix, first = self.prefix[grain], self.first[grain]
+        if first is None:
+            first = lo
+        n_periods = prefix.shape[1] - 1
+
+        # Grow the site axis and the period range on either side when needed.
+        new_first, new_end = min(first, lo), max(first + n_periods, hi + 1)
+        if prefix.shape[0] != n_sites or new_first != first or new_end != first + n_periods:
+            grown = np.zeros((n_sites, new_end - new_first + 1, len(self.columns)))
+            old_sites, offset = prefix.shape[0], first - new_first
+            grown[:old_sites, offset:offset + n_periods + 1] = prefix
+            # Prefix sums stay flat over added periods without data.
+            grown[:old_sites, offset + n_periods + 1:] = prefix[:, -1:]
+            prefix, first = grown, new_first
+            last = np.full(n_sites, _NO_PERIOD, dtype=np.int64)
+            last[:old_sites] = self.last[grain]
+            self.last[grain] = last
+
+        # Per-cell sums of the batch from period lo to the end, one bincount per column.
+        start = lo - first
+        width = prefix.shape[1] - 1 - start
+        cell = idx * width + (periods - lo)
+        delta = np.empty((n_sites, width, len(self.columns)))
+        for j, col in enumerate(values):
+            delta[:, :, j] = np.bincount(cell, weights=col, minlength=n_sites * width).reshape(n_sites, width)
+        seen = delta[:, :, -1] > 0
+        prefix[:, start + 1:] += np.cumsum(delta, axis=1, out=delta)
+
+        latest = lo + width - 1 - np.argmax(seen[:, ::-1], axis=1)
+        touched = seen.any(axis=1)
+        self.last[grain][touched] = np.maximum(self.last[grain][touched], latest[touched])
+
+        self.prefix[grain], self.first[grain] = prefix, first
+
+    def _check(self, grain):
+        if grain not in self.prefix:
+            raise KeyError(f"Grain {grain!r} is not materialized (have {self.grains})")
+        return self.prefix[grain]
+
+    def _bounds(self, grain, start, end):
+        # Prefix indices of the inclusive period range [start, end], clipped to the cube.
+        n = self.prefix[grain].shape[1] - 1
+        first = self.first[grain] or 0
+        lo = 0 if start is None else int(np.clip(to_period([start], grain)[0] - first, 0, n))
+        hi = n if end is None else int(np.clip(to_period([end], grain)[0] - first + 1, 0, n))
+        return lo, max(lo, hi)
+
+    def site_sums(self, start=None, end=None, grain='month'):
+        """
+        Sums and counts per site over the periods containing start..end (inclusive).
+        """
+        prefix = self._check(grain)
+        lo, hi = self._bounds(grain, start, end)
+        return pd.DataFrame(prefix[:, hi] - prefix[:, lo], index=self.site_ids, columns=self.columns)
+
+    def totals(self, start=None, end=None, grain='month'):
+        """
+        Fleet-wide sums and count over the periods containing start..end (inclusive).
+        """
+        prefix = self._check(grain)
+        lo, hi = self._bounds(grain, start, end)
+        return dict(zip(self.columns, (prefix[:, hi] - prefix[:, lo]).sum(axis=0).tolist()))
+
+    def trailing(self, periods, grain='month'):
+        """
+        Sums and counts per site over the `periods` calendar periods ending at
+        that site's latest data (site_kpis counts periods with data instead;
+        the two agree for gap-free series).
+        """
+        prefix = self._check(grain)
+        end = self.last[grain] - (self.first[grain] or 0) + 1
+        start = np.maximum(end - periods, 0)
+        rows = np.arange(len(self.site_ids))
+        return pd.DataFrame(prefix[rows, end] - prefix[rows, start], index=self.site_ids, columns=self.columns)
+
+    def series(self, grain='month', site=None):
+        """
+        Per-period sums for one site, or summed over the fleet, as a frame with a date column.
+        """
+        prefix = self._check(grain)
+        rows = prefix if site is None else prefix[[self.site_ids.get_loc(site)]]
+        values = np.diff(rows.sum(axis=0), axis=0)
+        frame = pd.DataFrame(values, columns=self.columns)
+        frame.insert(0, 'date', from_period(np.arange(len(values)) + (self.first[grain] or 0), grain))
+        return frame
+
+    def fleet_totals(self, trailing_months=12):
+        """
+        Portfolio totals with the keys of aggregation.fleet_totals: whole history
+        and each site's trailing window, summed across sites.
+        """
+        whole = self.totals(grain=self.grains[0])
+        annual = self.trailing(trailing_months, 'month').sum()
+        return {
+            'total_energy_kwh': whole['energy_consumption_kwh'],
+            'total_cost': whole['total_cost'],
+            'total_emission': whole['total_emission'],
+            'annual_energy_kwh': float(annual['energy_consumption_kwh']),
+            'annual_cost': float(annual['total_cost']),
+            'annual_emission': float(annual['total_emission']),
+        }
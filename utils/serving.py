@@ -0,0 +1,87 @@
+"""
+Sharing read-only data and models between the sessions of one server process.
+
+    flight = SingleFlight()
+    model = flight.do(key, lambda: expensive_load(key))   # concurrent callers share one load
+
+    df = view(shared_df)                                  # zero-copy, safe to modify
+
+Streamlit runs every session of a server as a thread in one process, so one
+copy of each loaded frame and fitted model can serve all of them: app.py keeps
+them in st.cache_resource, and forecast_cache / model_store keep their own
+process-wide LRUs. SingleFlight makes concurrent first requests for the same
+key wait for a single computation instead of each running it.
+
+view() hands out shallow copies. With pandas Copy-on-Write (always on from
+pandas 3; app.py calls enable_copy_on_write before handing out views) a
+shallow copy shares every buffer with the shared frame, and the first write
+through it copies only the touched column, so sessions can never modify each
+other's data.
+"""
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+
+
+def enable_copy_on_write():
+    """
+    Turn on pandas Copy-on-Write, which view() relies on. A no-op on pandas 3;
+    on pandas 2 it changes copy semantics for the whole process, so only the
+    app calls it, and importing this module never does.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls per key: while fn runs for a key, other
+    callers with the same key wait for its result (or exception). Nothing is
+    kept after the call finishes; callers cache results themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.stats['calls'] += 1
+            else:
+                self.stats['shared'] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def view(obj):
+    """
+    Zero-copy view of a shared frame or series (recursing into dicts); other
+    objects are returned as-is and must be treated as read-only.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj.copy(deep=False)
+    if isinstance(obj, dict):
+        return {key: view(value) for key, value in obj.items()}
+    return obj
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from .forecasting import FEATURES, calendar
+from .instrumentation import timed
+from .optimization import STRATEGIES, optimize_energy_grid
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+SCENARIO_CHUNK = 64  # scenarios per (chunk x n_samples) block, bounds peak memory
+
+
+def _quantile_columns(quantiles):
+    return [f"q{round(q * 100):02d}" for q in quantiles]
+
+
+def tree_paths(model, history, last_dates, horizon=3, series_codes=None):
+    """
+    Recursive forecast run separately through every tree of a fitted forest.
+
+    Each tree feeds its own predictions back as lags, so the spread across
+    trees reflects how model uncertainty compounds over the horizon.
+    Returns an (n_trees, n_series, horizon) array.
+    """
+    estimators = model.estimators_
+    n_trees = len(estimators)
+    n_series, window = history.shape
+    months, years = calendar(last_dates, horizon)
+
+    values = np.empty((n_trees, n_series, window + horizon))
+    values[:, :, :window] = history
+
+    n_features = len(FEATURES) + (series_codes is not None)
+    X = np.empty((n_trees, n_series, n_features))
+    if series_codes is not None:
+        X[:, :, -1] = series_codes
+
+    for h in range(horizon):
+        X[:, :, 0] = months[:, h]
+        X[:, :, 1] = years[:, h]
+        X[:, :, 2] = values[:, :, window + h - 1]
+        X[:, :, 3] = np.nanmean(values[:, :, h + window - 3:h + window], axis=2)
+        for t, estimator in enumerate(estimators):
+            values[t, :, window + h] = estimator.predict(X[t])
+
+    return values[:, :, window:]
+
+
+def direct_tree_predictions(model, X_next):
+    """
+    Per-tree output of a multi-output (direct) forest: (n_trees, n_series, horizon).
+    """
+    return np.stack([est.predict(X_next).reshape(len(X_next), -1) for est in model.estimators_])
+
+
+def residual_bootstrap(point_forecast, residuals, n_samples=10_000, seed=None):
+    """
+    Sample forecast paths by adding resampled holdout residuals to a point forecast.
+    Error at step h is scaled by sqrt(h) to reflect compounding in recursive forecasts.
+    Returns an (n_samples, horizon) array.
+    """
+    rng = np.random.default_rng(seed)
+    point_forecast = np.asarray(point_forecast, dtype=float)
+    draws = rng.choice(np.asarray(residuals, dtype=float), size=(n_samples, len(point_forecast)))
+    return point_forecast + draws * np.sqrt(np.arange(1, len(point_forecast) + 1))
+
+
+def residual_interval(point_forecast, residuals, interval=0.9):
+    """
+    (lower, upper) bounds of a symmetric `interval` around a point forecast:
+    the `interval` quantile of absolute holdout residuals. One-step residuals
+    (1-D) are scaled by sqrt(h) as in residual_bootstrap; direct residuals
+    (n_rows, horizon) give the quantile of each step.
+    """
+    point_forecast = np.asarray(point_forecast, dtype=float)
+    residuals = np.abs(np.asarray(residuals, dtype=float))
+    if residuals.ndim > 1:
+        half = np.quantile(residuals, interval, axis=0)
+    else:
+        half = np.quantile(residuals, interval) * np.sqrt(np.arange(1, len(point_forecast) + 1))
+    return point_forecast - half, point_forecast + half
+
+
+def quantile_bands(samples, quantiles=DEFAULT_QUANTILES, axis=0):
+    """
+    Quantiles of samples along `axis`, one column per quantile (q05, q50, ...).
+    """
+    bands = np.quantile(samples, quantiles, axis=axis)
+    return dict(zip(_quantile_columns(quantiles), bands))
+
+
+@timed()
+def simulate_scenarios(current_annual_energy, current_annual_cost, current_annual_emissions,
+                       reduction_pct, strategies=STRATEGIES, investment=None,
+                       tariff_sd=0.10, emission_factor_sd=0.10, n_samples=100_000,
+                       quantiles=DEFAULT_QUANTILES, seed=None, chunk_size=SCENARIO_CHUNK):
+    """
+    Monte Carlo version of optimize_energy_grid.
+
+    Tariff (cost_per_kwh) and emission-factor uncertainty are drawn as lognormal
+    multipliers with mean 1 and the given relative standard deviation. The same
+    draws are shared by every scenario (common random numbers), so differences
+    between scenarios are not blurred by sampling noise. With a fixed seed the
+    output is reproducible.
+
+    Returns the point-estimate grid with quantile columns added for
+    annual_savings, new_cost, new_emissions and roi.
+    """
+    grid = optimize_energy_grid(current_annual_energy, current_annual_cost, current_annual_emissions,
+                                reduction_pct, strategies, investment)
+
+    rng = np.random.default_rng(seed)
+
+    def lognormal_multiplier(rel_sd):
+        sigma = np.sqrt(np.log1p(rel_sd ** 2))
+        return rng.lognormal(-sigma ** 2 / 2, sigma, n_samples)
+
+    tariff = lognormal_multiplier(tariff_sd)
+    emission_factor = lognormal_multiplier(emission_factor_sd)
+
+    savings = grid['annual_savings'].to_numpy()
+    new_cost = grid['new_cost'].to_numpy()
+    new_emissions = grid['new_emissions'].to_numpy()
+    invest = grid['investment'].to_numpy()
+
+    names = _quantile_columns(quantiles)
+    out = {f"{metric}_{name}": np.empty(len(grid))
+           for metric in ('annual_savings', 'new_cost', 'new_emissions', 'roi') for name in names}
+
+    for start in range(0, len(grid), chunk_size):
+        rows = slice(start, start + chunk_size)
+        sampled = {
+            'annual_savings': savings[rows, None] * tariff,
+            'new_cost': new_cost[rows, None] * tariff,
+            'new_emissions': new_emissions[rows, None] * emission_factor,
+        }
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = invest[rows, None] / sampled['annual_savings']
+        sampled['roi'] = np.where((invest[rows, None] > 0) & (sampled['annual_savings'] > 0), roi, 0.0)
+
+        for metric, samples in sampled.items():
+            bands = np.quantile(samples, quantiles, axis=1)
+            for name, band in zip(names, bands):
+                out[f"{metric}_{name}"][rows] = band
+
+    return pd.concat([grid, pd.DataFrame(out, index=grid.index)], axis=1)